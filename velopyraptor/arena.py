@@ -0,0 +1,167 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Symbols are kept as the rows of one contiguous 2D numpy array (an arena)
+rather than as lists of separately allocated arrays.
+
+Large symbols are worked on a column stripe at a time.  Running every
+operation over one stripe before moving to the next keeps the rows being
+combined in cache instead of streaming whole symbols through memory for
+each operation.
+"""
+import glob
+import os
+
+import numpy
+
+import config
+
+# Used when the L2 cache size can not be found
+DEFAULT_CACHE_BYTES = 256 * 1024
+
+# Bounds on automatically chosen stripes.  Narrower stripes cost more in
+# per operation overhead than they save in memory traffic.
+MIN_STRIPE_BYTES = 64 * 1024
+MAX_STRIPE_BYTES = 1024 * 1024
+
+_cache_bytes = None
+
+def cache_bytes():
+    """
+    Finds the size of the L2 cache from sysfs
+
+    Returns an integer number of bytes
+    """
+    global _cache_bytes
+    if _cache_bytes is None:
+        _cache_bytes = DEFAULT_CACHE_BYTES
+        for index in glob.glob('/sys/devices/system/cpu/cpu0/cache/index*'):
+            try:
+                with open(os.path.join(index, 'level')) as f:
+                    level = int(f.read())
+                with open(os.path.join(index, 'size')) as f:
+                    size = f.read().strip()
+            except (IOError, ValueError):
+                continue
+            if level != 2:
+                continue
+            units = {'K': 1024, 'M': 1024 * 1024}
+            if size[-1:] in units:
+                _cache_bytes = int(size[:-1]) * units[size[-1]]
+            elif size.isdigit():
+                _cache_bytes = int(size)
+    return _cache_bytes
+
+def stripe_bytes():
+    """
+    Returns the width in bytes of a column stripe.  config.stripe_bytes
+    is used when set.  Otherwise a sixteenth of the L2 cache, which leaves
+    room for a target row and a run of its sources.
+    """
+    if config.stripe_bytes:
+        return config.stripe_bytes
+    return min(max(cache_bytes() // 16, MIN_STRIPE_BYTES), MAX_STRIPE_BYTES)
+
+def stripes(columns, itemsize):
+    """
+    Splits a range of the columns of symbols into stripes
+
+    Arguments:
+    columns  -- Slice of columns with a start and stop
+    itemsize -- Integer bytes per column
+
+    Returns a list of slices.  Ranges less than two stripes wide are
+    left whole.
+    """
+    width = max(stripe_bytes() // itemsize, 1)
+    if columns.stop - columns.start < 2 * width:
+        return [columns]
+    return [
+        slice(start, min(start + width, columns.stop))
+        for start in xrange(columns.start, columns.stop, width)
+    ]
+
+def allocate(symbols, zeros, scratch=0):
+    """
+    Copies symbols into a new arena after rows of zeros.  The callers
+    arrays are never written to.
+
+    Arguments:
+    symbols -- List of equal length numpy arrays
+    zeros   -- Integer number of zero rows to put first
+
+    Keyword Arguments:
+    scratch -- Integer number of zero rows to put last
+
+    Returns a ((zeros + len(symbols) + scratch) x symbol length) numpy array
+    """
+    first = symbols[0]
+    rows = zeros + len(symbols)
+    arena = numpy.empty((rows + scratch, len(first)), dtype=first.dtype)
+    arena[:zeros] = 0
+    arena[rows:] = 0
+    for row, symbol in enumerate(symbols, zeros):
+        arena[row] = symbol
+    return arena
+
+class PermutedRows(object):
+
+    """
+    Read only view of some of the rows of an arena in a different order.
+    Row i of the view is row order[i] of the arena.  Indexing with an
+    integer returns a view of the arena row, not a copy.
+    """
+
+    def __init__(self, arena, order):
+        """
+        Arguments:
+        arena -- 2D numpy array
+        order -- List of integer arena rows, one per row of the view
+        """
+        self.arena = arena
+        self.order = numpy.asarray(order, dtype='intp')
+
+    def __len__(self):
+        """
+        Returns the number of rows in the view
+        """
+        return len(self.order)
+
+    def __getitem__(self, i):
+        """
+        Returns row i of the view
+        """
+        return self.arena[self.order[i]]
+
+    def __iter__(self):
+        """
+        Iterates over the rows of the view in order
+        """
+        for row in self.order:
+            yield self.arena[row]
+
+    def take(self, rows, columns=slice(None)):
+        """
+        Gathers many rows of the view into a new array
+
+        Arguments:
+        rows -- numpy array of integer rows of the view
+
+        Keyword Arguments:
+        columns -- Slice of the columns to gather
+
+        Returns a numpy array shaped rows.shape + (columns,)
+        """
+        return self.arena[self.order[rows], columns]
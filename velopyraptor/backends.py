@@ -0,0 +1,337 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Interchangeable ways of storing symbols and XORing them together while a
+schedule is replayed.
+
+Symbols arrive and leave as the rows of a numpy arena.  A backend loads the
+arena into its own storage, replays operations on it and dumps the result
+back.  Which storage is fastest depends on the symbol size so select times
+every backend on a small synthetic schedule and remembers the winner.  The
+coder's own replay paths can be timed alongside them.
+"""
+import binascii
+import random
+import time
+
+import numpy
+
+from schedule import Schedule
+
+class Backend(object):
+
+    """
+    Storage for a list of equal length symbols and the operations a
+    schedule needs on them.  Subclasses implement everything but replay.
+    """
+
+    name = None
+
+    def supports(self, nbytes):
+        """
+        Returns True if symbols of nbytes bytes can be stored
+
+        Arguments:
+        nbytes -- Integer bytes per symbol
+        """
+        return True
+
+    def allocate(self, rows, nbytes):
+        """
+        Creates storage for rows zeroed symbols
+
+        Arguments:
+        rows   -- Integer number of symbols
+        nbytes -- Integer bytes per symbol
+        """
+        raise NotImplementedError
+
+    def load(self, arena):
+        """
+        Imports the rows of a numpy arena
+
+        Arguments:
+        arena -- Contiguous 2D numpy array, one symbol per row
+
+        Returns storage holding the same symbols
+        """
+        raise NotImplementedError
+
+    def dump(self, storage, arena):
+        """
+        Exports storage back into the rows of a numpy arena
+
+        Arguments:
+        storage -- Storage from load or allocate
+        arena   -- Contiguous 2D numpy array to write to
+        """
+        raise NotImplementedError
+
+    def xor(self, storage, target, source):
+        """
+        XORs symbol source into symbol target
+        """
+        raise NotImplementedError
+
+    def copy(self, storage, target, source):
+        """
+        Overwrites symbol target with symbol source
+        """
+        raise NotImplementedError
+
+    def is_zero(self, storage, row):
+        """
+        Returns True if every bit of symbol row is zero
+        """
+        raise NotImplementedError
+
+    def replay(self, storage, operations):
+        """
+        Replays fused operations on storage
+
+        Arguments:
+        storage    -- Storage from load or allocate
+        operations -- List of (target, sources, copy) tuples from
+            Schedule.optimized
+        """
+        xor = self.xor
+        copy = self.copy
+        for target, sources, first in operations:
+            if first:
+                copy(storage, target, sources[0])
+                sources = sources[1:]
+            for source in sources:
+                xor(storage, target, source)
+
+class NumpyBackend(Backend):
+
+    """
+    Keeps symbols as the rows of a 2D numpy array of one integer type
+    """
+
+    def __init__(self, dtype):
+        """
+        Arguments:
+        dtype -- String numpy unsigned integer type
+        """
+        self.dtype = numpy.dtype(dtype)
+        self.name = 'numpy-%s' % self.dtype.name
+
+    def supports(self, nbytes):
+        return nbytes % self.dtype.itemsize == 0
+
+    def allocate(self, rows, nbytes):
+        return numpy.zeros((rows, nbytes // self.dtype.itemsize), dtype=self.dtype)
+
+    def load(self, arena):
+        # Reinterpreting the arena's bytes is free and writes through
+        return arena.view(self.dtype)
+
+    def dump(self, storage, arena):
+        view = arena.view(self.dtype)
+        if storage is not view and not numpy.may_share_memory(storage, view):
+            view[:] = storage
+
+    def xor(self, storage, target, source):
+        row = storage[target]
+        numpy.bitwise_xor(storage[source], row, row)
+
+    def copy(self, storage, target, source):
+        storage[target] = storage[source]
+
+    def is_zero(self, storage, row):
+        return not storage[row].any()
+
+    def replay(self, storage, operations):
+        xor = numpy.bitwise_xor
+        for target, sources, first in operations:
+            row = storage[target]
+            if first:
+                row[:] = storage[sources[0]]
+                sources = sources[1:]
+            for source in sources:
+                xor(storage[source], row, row)
+
+class BigIntBackend(Backend):
+
+    """
+    Keeps each symbol as one arbitrary precision integer.  XOR of two longs
+    has very little per call overhead, so for symbols of up to about 256
+    bytes it beats numpy.  It does not pay off for large symbols.  Python
+    2 has no int.from_bytes, so load and dump go through hexlify and every
+    XOR allocates a new long.  At 4 KiB it is about 7 times slower than
+    numpy-uint64 and at 1 MiB about 18 times slower.
+    """
+
+    name = 'bigint'
+
+    def allocate(self, rows, nbytes):
+        return [0L] * rows
+
+    def load(self, arena):
+        return [
+            long(binascii.hexlify(row.tostring()) or '0', 16)
+            for row in arena
+        ]
+
+    def dump(self, storage, arena):
+        nbytes = arena.shape[1] * arena.itemsize
+        octets = arena.view('uint8')
+        for row, value in enumerate(storage):
+            raw = binascii.unhexlify('%0*x' % (nbytes * 2, value))
+            octets[row] = numpy.frombuffer(raw, dtype='uint8')
+
+    def xor(self, storage, target, source):
+        storage[target] ^= storage[source]
+
+    def copy(self, storage, target, source):
+        storage[target] = storage[source]
+
+    def is_zero(self, storage, row):
+        return storage[row] == 0
+
+    def replay(self, storage, operations):
+        for target, sources, first in operations:
+            if first:
+                value = storage[sources[0]]
+                sources = sources[1:]
+            else:
+                value = storage[target]
+            for source in sources:
+                value ^= storage[source]
+            storage[target] = value
+
+BACKENDS = dict((b.name, b) for b in [
+    NumpyBackend('uint64'),
+    NumpyBackend('uint8'),
+    BigIntBackend(),
+])
+
+# Symbols, leading zero symbols and operations in the synthetic schedule
+# select times
+BENCHMARK_ROWS = 32
+BENCHMARK_ZEROS = 8
+BENCHMARK_OPERATIONS = 128
+
+# (symbol size in bytes, name of the built in replay or None) -> name of
+# the fastest backend, None when the built in replay won
+_selected = {}
+
+def get(name):
+    """
+    Looks up a backend by name
+
+    Arguments:
+    name -- String name such as 'numpy-uint64'
+
+    Returns a Backend.  Raises KeyError for unknown names.
+    """
+    return BACKENDS[name]
+
+def synthetic():
+    """
+    Builds the schedule backends are timed on.  Each operation XORs three
+    random rows into another.
+
+    Returns a Schedule of BENCHMARK_ROWS rows whose first BENCHMARK_ZEROS
+    rows start out zero
+    """
+    rng = random.Random(0)
+    schedule = Schedule(BENCHMARK_ROWS, BENCHMARK_ROWS)
+    for i in xrange(BENCHMARK_OPERATIONS):
+        target = rng.randrange(BENCHMARK_ROWS)
+        for source in rng.sample([r for r in xrange(BENCHMARK_ROWS) if r != target], 3):
+            schedule.xor_rows(source, target)
+    return schedule
+
+def timed(replay, nbytes, repeat=3):
+    """
+    Times a function replaying the synthetic schedule onto random symbols
+
+    Arguments:
+    replay -- Function of a (BENCHMARK_ROWS x nbytes) uint8 arena
+    nbytes -- Integer bytes per symbol
+
+    Keyword Arguments:
+    repeat -- Integer number of runs to take the best of
+
+    Returns float seconds
+    """
+    raw = numpy.random.RandomState(0).bytes(BENCHMARK_ROWS * nbytes)
+    arena = numpy.frombuffer(raw, dtype='uint8').reshape(BENCHMARK_ROWS, nbytes).copy()
+    arena[:BENCHMARK_ZEROS] = 0
+    best = None
+    for i in xrange(repeat):
+        start = time.time()
+        replay(arena)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def benchmark(backend, nbytes, repeat=3):
+    """
+    Times a backend replaying a synthetic schedule including loading and
+    dumping the symbols
+
+    Arguments:
+    backend -- Backend to time
+    nbytes  -- Integer bytes per symbol
+
+    Keyword Arguments:
+    repeat -- Integer number of runs to take the best of
+
+    Returns float seconds
+    """
+    operations = synthetic().optimized(BENCHMARK_ZEROS, BENCHMARK_ROWS)[0]
+
+    def replay(arena):
+        storage = backend.load(arena)
+        backend.replay(storage, operations)
+        backend.dump(storage, arena)
+
+    return timed(replay, nbytes, repeat)
+
+def select(nbytes, builtin=None):
+    """
+    Picks the fastest backend for symbols of nbytes bytes.  The benchmark
+    runs once per symbol size.
+
+    Arguments:
+    nbytes -- Integer bytes per symbol
+
+    Keyword Arguments:
+    builtin -- Optional tuple (name, function) of the coder's own replay
+        to time as well.  function(schedule, arena, zeros, l) replays a
+        Schedule onto a uint8 arena.  name tells apart built in replays
+        that run differently, such as with more threads.
+
+    Returns a Backend or None when builtin is the fastest
+    """
+    key = (nbytes, builtin[0] if builtin else None)
+    if key not in _selected:
+        timings = [
+            (benchmark(backend, nbytes), name)
+            for name, backend in sorted(BACKENDS.items())
+            if backend.supports(nbytes)
+        ]
+        if builtin is not None:
+            schedule = synthetic()
+            replay = lambda arena: builtin[1](schedule, arena, BENCHMARK_ZEROS, BENCHMARK_ROWS)
+            timings.append((timed(replay, nbytes), None))
+        _selected[key] = min(timings)[1]
+    if _selected[key] is None:
+        return None
+    return BACKENDS[_selected[key]]
@@ -0,0 +1,173 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Compares the decoding schedules built with different options.  Run as
+
+    python benchmarks.py precomputation --k 64 256 1024 4096
+    python benchmarks.py inactivation --k 1024 4096 8192
+    python benchmarks.py prepass --k 1024 4096 8192
+    python benchmarks.py pivoting --k 256 1024 4096
+
+Schedules are built for the source symbols 0..k-1, the schedule every
+encoder needs.
+"""
+import time
+
+import pivoting as rules
+from raptor import RaptorR10
+
+def build(k, **options):
+    """
+    Builds the schedule for ESIs 0..k-1
+
+    Arguments:
+    k -- Integer number of source symbols
+
+    Keyword Arguments:
+    Passed on to RaptorR10
+
+    Returns tuple (Schedule, float seconds spent building it, dictionary
+    of counts from Schedule.live_operations)
+    """
+    coder = RaptorR10(k, **options)
+    coder.symbols = [(esi, None) for esi in xrange(k)]
+    start = time.time()
+    schedule = coder.decoding_schedule(coder.a())
+    elapsed = time.time() - start
+    needed, counts = schedule.live_operations(coder.s + coder.h, coder.l)
+    counts['live_xors'] = len(needed)
+    counts.update([('prepass_' + key, value) for key, value in coder.prepass_stats.items()])
+    return schedule, elapsed, counts
+
+def precomputation(ks):
+    """
+    Reports the symbol XORs saved by use_precomputation for each k
+
+    Arguments:
+    ks -- Iterable of integer k
+
+    Returns a list of (k, xors without, xors with) tuples counting the
+    operations left to replay
+    """
+    rows = []
+    for k in ks:
+        plain = build(k)[2]['live_xors']
+        schedule, elapsed, counts = build(k, use_precomputation=True)
+        rows.append((k, plain, counts['live_xors']))
+        print "k=%5d xors %8d -> %8d (%5.1f%% fewer, %d scratch rows, %.2fs)" % (
+            k, plain, counts['live_xors'],
+            100.0 * (plain - counts['live_xors']) / max(plain, 1),
+            schedule.scratch, elapsed
+        )
+    return rows
+
+def inactivation(ks):
+    """
+    Reports the time to build a schedule by inactivation decoding against
+    the rfc 5053 phases for each k.  inactivation_schedule never runs the
+    prepass, so the rfc phases run without it too and both start from the
+    same matrix.
+
+    Arguments:
+    ks -- Iterable of integer k
+
+    Returns a list of (k, seconds without, seconds with) tuples
+    """
+    rows = []
+    for k in ks:
+        schedule, plain, plain_counts = build(k, use_prepass=False)
+        schedule, elapsed, counts = build(k, use_prepass=False, use_inactivation=True)
+        rows.append((k, plain, elapsed))
+        print "k=%5d schedule %7.2fs -> %7.2fs (%5.1fx), xors %8d -> %8d" % (
+            k, plain, elapsed, plain / max(elapsed, 1e-6),
+            plain_counts['live_xors'], counts['live_xors']
+        )
+    return rows
+
+def prepass(ks, budget=None):
+    """
+    Reports what the prepass costs to run and the symbol XORs it saves
+    for each k
+
+    Arguments:
+    ks -- Iterable of integer k
+
+    Keyword Arguments:
+    budget -- Optional integer prepass_budget
+
+    Returns a list of (k, seconds without, seconds with, xors without,
+    xors with) tuples
+    """
+    rows = []
+    for k in ks:
+        schedule, plain, plain_counts = build(k, use_prepass=False)
+        schedule, elapsed, counts = build(k, prepass_budget=budget)
+        rows.append((k, plain, elapsed, plain_counts['live_xors'], counts['live_xors']))
+        print "k=%5d schedule %7.2fs -> %7.2fs, xors %8d -> %8d (%d saved, %d spent in the prepass%s)" % (
+            k, plain, elapsed, plain_counts['live_xors'], counts['live_xors'],
+            plain_counts['live_xors'] - counts['live_xors'], counts['prepass_xors'],
+            ", budget ran out" if counts['prepass_exhausted'] else ""
+        )
+    return rows
+
+def pivoting(ks, use_inactivation=False):
+    """
+    Reports the symbol XORs and build time of the schedule made with each
+    pivoting rule for each k and which rule needs the fewest XORs
+
+    Arguments:
+    ks -- Iterable of integer k
+
+    Keyword Arguments:
+    use_inactivation -- Boolean build the schedules by inactivation
+        decoding
+
+    Returns a dictionary of k -> name of the rule with the fewest XORs
+    """
+    best = {}
+    for k in ks:
+        results = []
+        for name in sorted(rules.STRATEGIES):
+            schedule, elapsed, counts = build(
+                k, pivoting=name, use_inactivation=use_inactivation
+            )
+            results.append((counts['live_xors'], elapsed, name))
+            print "k=%5d %-10s xors %8d (%.2fs)" % (k, name, counts['live_xors'], elapsed)
+        best[k] = min(results)[2]
+        print "k=%5d fewest xors with %s" % (k, best[k])
+    return best
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python benchmarks.py",
+        description="Compare raptor r10 decoding schedule options"
+    )
+
+    parser.add_argument('benchmark', choices=['precomputation', 'inactivation', 'prepass', 'pivoting'], help="Benchmark to run")
+    parser.add_argument('--k', nargs='+', type=int, default=[64, 256, 1024, 4096], help="Values of k to run.(default 64 256 1024 4096)")
+    parser.add_argument('--inactivation', default=False, action="store_true", help="Build the pivoting benchmark's schedules by inactivation decoding.")
+    parser.add_argument('--budget', default=None, type=int, help="Prepass budget for the prepass benchmark.(default none)")
+
+    args = parser.parse_args()
+    if args.benchmark == 'precomputation':
+        precomputation(args.k)
+    elif args.benchmark == 'inactivation':
+        inactivation(args.k)
+    elif args.benchmark == 'prepass':
+        prepass(args.k, args.budget)
+    elif args.benchmark == 'pivoting':
+        pivoting(args.k, args.inactivation)
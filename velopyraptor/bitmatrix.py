@@ -0,0 +1,369 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Packed matrices over GF(2).  Each row is stored as a run of uint64 words
+within a single 2D numpy array so that whole rows, or whole groups of rows,
+can be XORed in one numpy call.  Column c lives in word c / 64 at bit c % 64.
+
+Columns are never physically moved.  A matrix keeps a permutation from the
+columns callers see to the columns in the packed words and remaps a column
+only when it is read, so exchanging two columns costs O(1).
+"""
+import numpy
+from bitarray import bitarray
+
+WORD_BITS = 64
+
+# BITS[n] is a word with only the n'th bit set
+BITS = numpy.array([1 << n for n in xrange(WORD_BITS)], dtype='uint64')
+
+# LOW[n] is a word with the lowest n bits set
+LOW = numpy.array([(1 << n) - 1 for n in xrange(WORD_BITS + 1)], dtype='uint64')
+
+# Number of ones in every possible byte
+POPCOUNT = numpy.array([bin(n).count('1') for n in xrange(256)], dtype='uint8')
+
+def words_for(columns):
+    """
+    Returns the number of words needed to hold columns bits
+
+    Arguments:
+    columns -- Integer number of columns
+    """
+    return (columns + WORD_BITS - 1) // WORD_BITS
+
+def popcount(words):
+    """
+    Counts the ones in each row of a 2D array of words
+
+    Arguments:
+    words -- (n x w) numpy array of uint64s
+
+    Returns a numpy array of n integers
+    """
+    if not words.shape[0]:
+        return numpy.zeros(0, dtype='int64')
+    octets = numpy.ascontiguousarray(words).view('uint8')
+    return POPCOUNT[octets].sum(axis=1, dtype='int64')
+
+def pack(bits, columns):
+    """
+    Packs a 2D array of booleans into rows of words
+
+    Arguments:
+    bits    -- (n x columns) numpy array of booleans
+    columns -- Integer number of columns
+
+    Returns a (n x words_for(columns)) numpy array of uint64s
+    """
+    rows = bits.shape[0]
+    width = words_for(columns)
+    padded = numpy.zeros((rows, width * WORD_BITS), dtype='uint8')
+    padded[:, :columns] = bits
+
+    # packbits puts the first bit in the high end of a byte.  Reverse each
+    # group of 8 so column 0 becomes bit 0 of the little endian word
+    octets = numpy.packbits(padded.reshape(rows, -1, 8)[:, :, ::-1], axis=2)
+    words = octets.reshape(rows, width * 8).view('<u8')
+    return words.astype('uint64')
+
+def unpack(words, columns):
+    """
+    Reverses pack
+
+    Arguments:
+    words   -- (n x w) numpy array of uint64s
+    columns -- Integer number of columns to keep
+
+    Returns a (n x columns) numpy array of booleans
+    """
+    rows = words.shape[0]
+    octets = numpy.ascontiguousarray(words, dtype='<u8').view('uint8')
+    bits = numpy.unpackbits(octets.reshape(rows, -1, 1), axis=2)
+    return bits[:, :, ::-1].reshape(rows, -1)[:, :columns].astype(bool)
+
+class BitMatrix(object):
+
+    """
+    A rows x columns matrix over GF(2) packed into 64 bit words
+
+    order[c] is the packed column holding column c and position is the
+    inverse of order
+    """
+
+    def __init__(self, rows, columns, data=None):
+        """
+        Arguments:
+        rows    -- Integer number of rows
+        columns -- Integer number of columns
+
+        Keyword Arguments:
+        data -- Optional (rows x words_for(columns)) numpy array of uint64s
+            to use as the matrix.  The matrix is zero when omitted.
+        """
+        self.rows = rows
+        self.columns = columns
+        self.width = words_for(columns)
+        if data is None:
+            data = numpy.zeros((rows, self.width), dtype='uint64')
+        self.data = data
+        self.order = range(columns)
+        self.position = range(columns)
+        self.permuted = False
+
+    @classmethod
+    def from_bitarrays(cls, bitarrays):
+        """
+        Packs a list of equal length bitarrays into a matrix
+
+        Arguments:
+        bitarrays -- List of bitarrays, one per row
+        """
+        columns = len(bitarrays[0]) if bitarrays else 0
+
+        # Big endian bitarrays keep their first bit in the high end of
+        # each byte just like unpackbits expects
+        raw = "".join([bitarray(row, endian='big').tobytes() for row in bitarrays])
+        octets = numpy.frombuffer(raw, dtype='uint8')
+        octets = octets.reshape(len(bitarrays), -1)
+        bits = numpy.unpackbits(octets, axis=1)[:, :columns]
+        return cls(len(bitarrays), columns, pack(bits, columns))
+
+    @classmethod
+    def from_columns(cls, rows, columns):
+        """
+        Builds a matrix from the columns set in each row
+
+        Arguments:
+        rows    -- List with a list of integer columns for each row
+        columns -- Integer number of columns
+
+        Returns a BitMatrix
+        """
+        m = cls(len(rows), columns)
+        lengths = [len(row) for row in rows]
+        if sum(lengths):
+            row_ids = numpy.repeat(numpy.arange(len(rows)), lengths)
+            ones = numpy.concatenate([numpy.asarray(row, dtype='intp') for row in rows])
+            m.set_many(row_ids, ones)
+        return m
+
+    @classmethod
+    def from_padded(cls, indices, columns):
+        """
+        Builds a matrix from a 2D array of the columns set in each row.
+        Negative entries are padding and are skipped.
+
+        Arguments:
+        indices -- (rows x n) numpy array of integer columns
+        columns -- Integer number of columns
+
+        Returns a BitMatrix
+        """
+        m = cls(len(indices), columns)
+        row_ids, j = numpy.nonzero(indices >= 0)
+        m.set_many(row_ids, indices[row_ids, j])
+        return m
+
+    def to_bitarrays(self):
+        """
+        Returns the matrix as a list of bitarrays, one per row
+        """
+        bits = unpack(self.data, self.columns)
+        if self.permuted:
+            bits = bits[:, self.order]
+        return [bitarray(row.tolist()) for row in bits]
+
+    def __len__(self):
+        """
+        Returns the number of rows
+        """
+        return self.rows
+
+    def copy(self):
+        """
+        Returns a deep copy of this matrix
+        """
+        m = BitMatrix(self.rows, self.columns, self.data.copy())
+        m.order = self.order[:]
+        m.position = self.position[:]
+        m.permuted = self.permuted
+        return m
+
+    def mask(self, start, stop):
+        """
+        Builds a row of words with the bits of columns start through
+        stop - 1 set
+
+        Arguments:
+        start -- Integer first column
+        stop  -- Integer column after the last column
+        """
+        if self.permuted:
+            bits = numpy.zeros((1, self.columns), dtype=bool)
+            bits[0, self.order[start:stop]] = True
+            return pack(bits, self.columns)[0]
+
+        first = numpy.arange(self.width) * WORD_BITS
+        low = numpy.clip(start - first, 0, WORD_BITS)
+        high = numpy.clip(stop - first, 0, WORD_BITS)
+        return LOW[high] & ~LOW[low]
+
+    def get(self, row, column):
+        """
+        Returns True if the bit at row, column is set
+        """
+        column = self.order[column]
+        return bool(self.data[row, column >> 6] & BITS[column & 63])
+
+    def set(self, row, column, value=True):
+        """
+        Sets the bit at row, column to value
+        """
+        column = self.order[column]
+        if value:
+            self.data[row, column >> 6] |= BITS[column & 63]
+        else:
+            self.data[row, column >> 6] &= ~BITS[column & 63]
+
+    def set_many(self, rows, columns):
+        """
+        Sets the bit at rows[i], columns[i] for every i.  Columns are
+        packed columns, not remapped through the permutation.
+
+        Arguments:
+        rows    -- numpy array of integer rows
+        columns -- numpy array of integer columns
+        """
+        columns = numpy.asarray(columns, dtype='intp')
+        numpy.bitwise_or.at(self.data, (rows, columns >> 6), BITS[columns & 63])
+
+    def count(self, row, mask=None):
+        """
+        Counts the ones in a row
+
+        Arguments:
+        row -- Integer row to count
+
+        Keyword Arguments:
+        mask -- Optional row of words limiting the columns counted
+        """
+        return int(self.counts(row, row + 1, mask)[0])
+
+    def counts(self, start, stop, mask=None):
+        """
+        Counts the ones in each of rows start through stop - 1
+
+        Arguments:
+        start -- Integer first row
+        stop  -- Integer row after the last row
+
+        Keyword Arguments:
+        mask -- Optional row of words limiting the columns counted
+
+        Returns a numpy array of stop - start integers
+        """
+        words = self.data[start:stop]
+        if mask is not None:
+            words = words & mask
+        return popcount(words)
+
+    def ones(self, row, start=0, stop=None):
+        """
+        Lists the columns set in a row
+
+        Arguments:
+        row -- Integer row
+
+        Keyword Arguments:
+        start -- Integer first column to consider
+        stop  -- Integer column after the last column to consider
+
+        Returns an ascending list of integer columns
+        """
+        if stop is None:
+            stop = self.columns
+        bits = unpack(self.data[row:row + 1], self.columns)[0]
+        if not self.permuted:
+            return (numpy.flatnonzero(bits[start:stop]) + start).tolist()
+
+        position = self.position
+        ones = [position[c] for c in numpy.flatnonzero(bits).tolist()]
+        return sorted([c for c in ones if start <= c < stop])
+
+    def column(self, column, start=0, stop=None):
+        """
+        Finds every row between start and stop with a one in column.
+        This is the pivot search over all rows at once.
+
+        Arguments:
+        column -- Integer column to search
+
+        Keyword Arguments:
+        start -- Integer first row to search
+        stop  -- Integer row after the last row to search
+
+        Returns an ascending numpy array of row indexes
+        """
+        if stop is None:
+            stop = self.rows
+        column = self.order[column]
+        hits = self.data[start:stop, column >> 6] & BITS[column & 63]
+        return numpy.flatnonzero(hits) + start
+
+    def xor_row(self, target, source):
+        """
+        XORs row source into row target
+        """
+        self.data[target] ^= self.data[source]
+
+    def eliminate(self, pivot, column, start=0, stop=None):
+        """
+        XORs row pivot into every row between start and stop that
+        has a one in column
+
+        Arguments:
+        pivot  -- Integer row to XOR into the others
+        column -- Integer column to clear
+
+        Keyword Arguments:
+        start -- Integer first row to consider
+        stop  -- Integer row after the last row to consider
+
+        Returns an ascending numpy array of the rows that were changed
+        """
+        rows = self.column(column, start, stop)
+        rows = rows[rows != pivot]
+        if rows.size:
+            self.data[rows] ^= self.data[pivot]
+        return rows
+
+    def swap_rows(self, r1, r2):
+        """
+        Exchanges rows r1 and r2
+        """
+        if r1 != r2:
+            self.data[[r1, r2]] = self.data[[r2, r1]]
+
+    def swap_columns(self, c1, c2):
+        """
+        Exchanges columns c1 and c2 in every row.  Only the permutation
+        changes so this is O(1)
+        """
+        order = self.order
+        order[c1], order[c2] = order[c2], order[c1]
+        self.position[order[c1]] = c1
+        self.position[order[c2]] = c2
+        self.permuted = True
@@ -0,0 +1,128 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+class DegreeBuckets(object):
+
+    """
+    Tracks the number of ones each remaining row of matrix A has within
+    submatrix V (r in rfc 5053) and groups the rows by that number.
+
+    Phase 1 only ever shrinks V, and XORing the pivot row into the rows
+    below it only changes columns that are leaving V.  A row's weight can
+    therefore only drop by one for each column leaving V that the row has a
+    one in, which is all this structure needs to be told about.
+
+    Rows entering and leaving weight 2 are passed on to an optional
+    ComponentTracker so the graph of weight 2 rows stays current.
+    """
+
+    def __init__(self, weights, start=0, components=None):
+        """
+        Arguments:
+        weights -- List of integer weights within V, one per row of A
+
+        Keyword Arguments:
+        start -- Integer first row to track.  Rows before start are
+            already part of the identity and are ignored.
+        components -- Optional ComponentTracker to keep informed of the
+            rows with weight 2
+        """
+        self.weights = list(weights)
+        self.components = components
+        self.buckets = [set() for i in xrange(max(self.weights + [0]) + 1)]
+        for row in xrange(start, len(self.weights)):
+            self.buckets[self.weights[row]].add(row)
+            if components is not None and self.weights[row] == 2:
+                components.add(row)
+
+        # Every nonempty bucket above 0 is at least this heavy
+        self.low = 1
+
+    def minimum(self):
+        """
+        Finds the rows with the fewest ones in V ignoring rows
+        without any
+
+        Returns tuple (minimum r, set of rows with minimum r).  r is None
+        when there are no rows left with ones in V.
+        """
+        for r in xrange(max(self.low, 1), len(self.buckets)):
+            if self.buckets[r]:
+                self.low = r
+                return r, self.buckets[r]
+        self.low = len(self.buckets)
+        return None, set()
+
+    def remove(self, row):
+        """
+        Stops tracking a row.  Used once a row becomes a pivot.
+
+        Arguments:
+        row -- Integer row of A
+        """
+        self.buckets[self.weights[row]].discard(row)
+        if self.components is not None and self.weights[row] == 2:
+            self.components.discard(row)
+        self.weights[row] = 0
+
+    def swap(self, r1, r2):
+        """
+        Follows an exchange of rows r1 and r2 of A
+
+        Arguments:
+        r1 -- Integer first row
+        r2 -- Integer second row
+        """
+        weights = self.weights
+        w1, w2 = weights[r1], weights[r2]
+        b1, b2 = self.buckets[w1], self.buckets[w2]
+        tracked1, tracked2 = r1 in b1, r2 in b2
+        b1.discard(r1)
+        b2.discard(r2)
+        if tracked1:
+            b1.add(r2)
+        if tracked2:
+            b2.add(r1)
+        weights[r1], weights[r2] = w2, w1
+        if self.components is not None:
+            self.components.swap(r1, r2)
+
+    def decrement(self, rows):
+        """
+        Lowers the weight of each row by one.  Called with the rows that
+        have a one in a column as that column leaves V.
+
+        Arguments:
+        rows -- Iterable of integer rows
+        """
+        weights = self.weights
+        buckets = self.buckets
+        components = self.components
+        for row in rows:
+            w = weights[row]
+            if row not in buckets[w]:
+                continue
+            buckets[w].remove(row)
+            buckets[w - 1].add(row)
+            weights[row] = w - 1
+            if w - 1 < self.low:
+                self.low = w - 1
+
+            if components is not None:
+                if w == 3:
+                    components.add(row)
+                elif w == 2:
+                    components.discard(row)
@@ -0,0 +1,116 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import threading
+from collections import OrderedDict
+
+class LRUCache(object):
+
+    """
+    A bounded, thread safe mapping that drops the least recently used
+    entry once it holds more than size entries.  Counts hits and misses.
+
+    size may be a function returning the limit, which is then read on
+    every lookup so the limit can follow a setting changed at run time.
+    """
+
+    def __init__(self, size):
+        """
+        Arguments:
+        size -- Integer maximum number of entries or a function returning
+            it.  0 disables the cache.
+        """
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """
+        Returns the number of entries held
+        """
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Looks up key and marks it as the most recently used
+
+        Arguments:
+        key -- Hashable key
+
+        Returns the value or None if key is not held
+        """
+        with self.lock:
+            self.trim()
+            value = self.entries.pop(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores value under key dropping the least recently used entry
+        if the cache is full
+
+        Arguments:
+        key   -- Hashable key
+        value -- Any value other than None
+        """
+        with self.lock:
+            self.entries.pop(key, None)
+            if self.limit() > 0:
+                self.entries[key] = value
+            self.trim()
+
+    def limit(self):
+        """
+        Returns the integer maximum number of entries
+        """
+        if callable(self.size):
+            return self.size()
+        return self.size
+
+    def trim(self):
+        """
+        Drops the least recently used entries beyond the limit.  Callers
+        hold the lock.
+        """
+        limit = max(self.limit(), 0)
+        while len(self.entries) > limit:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns a dictionary with the hits, misses and number of entries
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.entries),
+            }
@@ -0,0 +1,271 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import heapq
+
+class ComponentTracker(object):
+
+    """
+    Tracks the connected components of the graph described in
+    http://tools.ietf.org/html/rfc5053#section-5.5.2.2 whose vertices are
+    the columns of submatrix V and whose edges are the rows with exactly two
+    ones in V.
+
+    Components are kept in a union-find over the columns.  New edges are
+    joined in near constant time when the graph is next queried.  Union-find
+    can not split a component, so removing or moving an edge that was
+    already joined only marks its own component dirty and the next query
+    rebuilds that component from the edges it has left.
+
+    Rows with the same two columns count as separate edges and ties go to
+    the lowest row.  The networkx graph used before merged such rows into
+    one edge and took whichever edge it listed first, so the schedules
+    built with this tracker are not the ones built before it.
+    """
+
+    def __init__(self):
+        """
+        Starts with an empty graph
+        """
+        # row -> (column, column) for every joined edge
+        self.edges = {}
+
+        # Rows that became edges since the last query
+        self.pending = set()
+
+        self.parent = {}
+
+        # root -> number of edges in the component
+        self.size = {}
+
+        # root -> lowest row in the component
+        self.lowest = {}
+
+        # root -> set of the rows in the component
+        self.rows = {}
+
+        # root -> set of the columns of edges removed from the component
+        # since the last query
+        self.dirty = {}
+
+        # Heap of (-size, lowest row, root), stale entries are skipped
+        self.heap = []
+
+    @property
+    def best(self):
+        """
+        Root of the largest component, the one with the lowest row among
+        the largest, or None without edges
+        """
+        heap, size, lowest = self.heap, self.size, self.lowest
+        while heap:
+            count, row, root = heap[0]
+            if size.get(root) == -count and lowest.get(root) == row:
+                return root
+            heapq.heappop(heap)
+        return None
+
+    def add(self, row):
+        """
+        Adds the edge for a row that now has two ones in V.  The columns
+        are looked up when the graph is next queried.
+
+        Arguments:
+        row -- Integer row of A
+        """
+        self.pending.add(row)
+
+    def remove(self, row):
+        """
+        Takes a joined edge out of its component and marks the component
+        dirty
+
+        Returns the tuple of the edge's columns
+        """
+        edge = self.edges.pop(row)
+        root = self.find(edge[0])
+        self.rows[root].discard(row)
+        self.dirty.setdefault(root, set()).update(edge)
+        return edge
+
+    def discard(self, row):
+        """
+        Removes the edge for a row that no longer has two ones in V
+
+        Arguments:
+        row -- Integer row of A
+        """
+        if row in self.pending:
+            self.pending.remove(row)
+        elif row in self.edges:
+            self.remove(row)
+
+    def swap(self, r1, r2):
+        """
+        Follows an exchange of rows r1 and r2 of A
+
+        Arguments:
+        r1 -- Integer first row
+        r2 -- Integer second row
+        """
+        pending = self.pending
+        in1, in2 = r1 in pending, r2 in pending
+        pending.discard(r1)
+        pending.discard(r2)
+        if in1:
+            pending.add(r2)
+        if in2:
+            pending.add(r1)
+
+        # The moved edges keep their columns, only the components' rows and
+        # lowest rows change
+        edges = self.edges
+        e1 = self.remove(r1) if r1 in edges else None
+        e2 = self.remove(r2) if r2 in edges else None
+        for row, edge in ((r2, e1), (r1, e2)):
+            if edge is not None:
+                edges[row] = edge
+                self.rows[self.find(edge[0])].add(row)
+
+    def find(self, column):
+        """
+        Returns the root of the component holding column
+        """
+        parent = self.parent
+        root = column
+        while parent[root] != root:
+            root = parent[root]
+
+        # Compress the path behind us
+        while parent[column] != root:
+            parent[column], column = root, parent[column]
+        return root
+
+    def join(self, row, c1, c2):
+        """
+        Joins the components of columns c1 and c2 through row
+
+        Arguments:
+        row -- Integer row of A
+        c1  -- First column the row has a one in
+        c2  -- Second column the row has a one in
+        """
+        parent, size, lowest, rows = self.parent, self.size, self.lowest, self.rows
+        for column in (c1, c2):
+            if column not in parent:
+                parent[column] = column
+                size[column] = 0
+                lowest[column] = row
+                rows[column] = set()
+
+        r1, r2 = self.find(c1), self.find(c2)
+        if r1 != r2:
+            if size[r1] < size[r2]:
+                r1, r2 = r2, r1
+            parent[r2] = r1
+            size[r1] += size.pop(r2)
+            lowest[r1] = min(lowest[r1], lowest.pop(r2))
+            rows[r1] |= rows.pop(r2)
+
+        size[r1] += 1
+        lowest[r1] = min(lowest[r1], row)
+        rows[r1].add(row)
+        self.edges[row] = (c1, c2)
+        heapq.heappush(self.heap, (-size[r1], lowest[r1], r1))
+
+    def rebuild(self):
+        """
+        Recreates the dirty components from the edges they have left.
+        Every column of a dirty component is either a column of one of
+        its edges or was recorded in dirty when its edge was removed, so
+        all of them are forgotten before the edges are joined again.
+        Sizes and lowest rows are only totalled once every edge is joined,
+        which is much cheaper than keeping them current through join.
+        """
+        parent, edges = self.parent, self.edges
+        size, lowest, rows = self.size, self.lowest, self.rows
+        dirty, self.dirty = self.dirty, {}
+        for root, loose in dirty.iteritems():
+            old = rows.pop(root)
+            del size[root], lowest[root]
+            for column in loose:
+                parent.pop(column, None)
+            for row in old:
+                c1, c2 = edges[row]
+                parent[c1] = c1
+                parent[c2] = c2
+
+            for row in old:
+                c1, c2 = edges[row]
+                r1, r2 = c1, c2
+                while parent[r1] != r1:
+                    r1 = parent[r1]
+                while parent[r2] != r2:
+                    r2 = parent[r2]
+                if r1 != r2:
+                    parent[r2] = r1
+                parent[c1] = parent[c2] = r1
+
+            split = set()
+            for row in old:
+                r = self.find(edges[row][0])
+                if r not in rows:
+                    rows[r] = set()
+                    size[r] = 0
+                    lowest[r] = row
+                    split.add(r)
+                rows[r].add(row)
+                size[r] += 1
+                if row < lowest[r]:
+                    lowest[r] = row
+            for r in split:
+                heapq.heappush(self.heap, (-size[r], lowest[r], r))
+
+    def largest(self, columns_of):
+        """
+        Picks the lowest row from the component with the most edges
+
+        Arguments:
+        columns_of -- Function returning the two columns of V in which
+            a row has ones
+
+        Returns an integer row or None when there are no edges
+        """
+        if self.dirty:
+            self.rebuild()
+
+        for row in sorted(self.pending):
+            c1, c2 = columns_of(row)
+            self.join(row, c1, c2)
+        self.pending.clear()
+
+        best = self.best
+        if best is None:
+            return None
+        return self.lowest[best]
+
+    def largest_rows(self, columns_of):
+        """
+        Lists every row of the component with the most edges
+
+        Arguments:
+        columns_of -- Function returning the two columns of V in which
+            a row has ones
+
+        Returns a list of integer rows, empty when there are no edges
+        """
+        if self.largest(columns_of) is None:
+            return []
+        return list(self.rows[self.best])
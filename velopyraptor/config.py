@@ -1,3 +1,4 @@
+import os
 import platform
 
 # If true indicates 64 bit architecture, false indicates 32 bit
@@ -9,3 +10,48 @@ if _64BIT:
 else:
     dtype="uint32"
     alignment = 4
+
+# Number of decoding schedules kept by RaptorR10.schedule_cache.  Read
+# whenever the cache is used, so lowering it drops the oldest schedules on
+# the next lookup and 0 turns the cache off.
+schedule_cache_size = 256
+
+# Number of per k CodingContexts kept by RaptorR10.context_cache, read the
+# same way
+context_cache_size = 32
+
+# Directory of encoding plans written by plans.py.  Encoders load the
+# plan for their k from here instead of building it when one exists.
+plan_directory = os.environ.get('VELOPYRAPTOR_PLANS')
+
+# Most index entries the prepass visits looking for rows to XOR together
+# before it gives up.  None lets it finish.  Part of the schedule options
+# since stopping early changes the schedule.
+prepass_budget = None
+
+# Name of the rule from pivoting.py choosing the pivots of phase 1.  'rfc'
+# is the rule of rfc 5053.  'min-xor' and 'markowitz' usually save a few
+# percent of the symbol XORs but take longer to build a schedule.
+pivoting = 'rfc'
+
+# Symbols up to this many bytes are decoded a level of independent
+# operations at a time.  Gathering whole levels costs more than it saves
+# once symbols no longer fit comfortably in cache.
+level_replay_max_bytes = 4096
+
+# Most live xors a schedule may have to be compiled by use_compiled_replay.
+# The generated source grows by a line per xor and compiling 300000 of
+# them takes seconds and over a gigabyte, so larger schedules replay the
+# fused operations instead.
+compiled_replay_max_operations = 32768
+
+# Width in bytes of the column stripes large symbols are decoded and
+# encoded in.  None picks a width from the L2 cache size.
+stripe_bytes = None
+
+# Backend symbols are replayed with.  None keeps the built in numpy paths
+# (level replay, stripes, threads and compiled replay), 'auto' times them
+# and every backend in backends.py once per symbol size and uses the
+# fastest, and any other value names a backend such as 'bigint', which
+# replaces the built in paths.
+backend = None
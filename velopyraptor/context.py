@@ -0,0 +1,91 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import math
+import threading
+
+import distributions.half as half
+import distributions.primes as primes
+from distributions.systematic_index import systematic_index
+
+# Modulus of the triple generator in rfc 5053 section 5.4.4.4
+Q = 65521
+
+class CodingContext(object):
+
+    """
+    Everything about Raptor R10 coding that depends only on k.
+
+    The parameters are calculated when the context is created.  Anything
+    expensive, such as the constraint rows of a or the encoding schedule,
+    is built the first time it is asked for through lazy() and then kept
+    for the life of the context.  A value is never replaced once stored so
+    a context can be shared between threads and coders.
+    """
+
+    def __init__(self, k):
+        """
+        Arguments:
+        k -- Integer number of source symbols
+        """
+        self.k = k
+
+        # Let X be the smallest positive integer such that X*(X-1) >= 2*K.
+        # a = 1, b =-1 c = -2(k)
+        # quadratic = ((b * -1) + math.sqrt((b * b) - (4 * a * c))) / (2 * a)
+        c = -2 * k
+        self.x = int(math.ceil(((1) + math.sqrt((1) - (4 * c))) / (2)))
+
+        # Let S be the smallest prime integer such that S >= ceil(0.01*K) + X
+        self.s = primes.next(math.ceil(0.01 * k) + self.x)
+
+        # Let H be the smallest integer such that choose(H,ceil(H/2)) >= K + S
+        self.h = half.next(k + self.s) if self.s else None
+
+        # Let H' be ceil(H/2)
+        self.h_prime = int(math.ceil(self.h / 2.0)) if self.h else None
+
+        # Let L be k + s + h
+        self.l = k + self.s + self.h if self.h else None
+
+        # Let L' be the smallest prime number such that L' >= L
+        self.l_prime = primes.next(self.l) if self.l else None
+
+        # Choose a systematic index based upon k.
+        self.systematic_index = systematic_index[k]
+
+        # Constants of the triple generator
+        self.triple_a = (53591 + self.systematic_index * 997) % Q
+        self.triple_b = 10267 * (self.systematic_index + 1) % Q
+
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def lazy(self, key, build):
+        """
+        Returns the value stored under key building and storing it first
+        if there is none.  Two threads may both build a missing value but
+        only the first one stored is ever returned.
+
+        Arguments:
+        key   -- Hashable key
+        build -- Function of no arguments returning the value
+        """
+        value = self.values.get(key)
+        if value is None:
+            value = build()
+            with self.lock:
+                value = self.values.setdefault(key, value)
+        return value
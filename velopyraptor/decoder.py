@@ -13,18 +13,38 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-from raptor import RaptorR10
+import numpy
+
+import arena
+import inactivation
+from bitmatrix import BitMatrix
+from echelon import Echelon
+from raptor import RaptorR10, RaptorR10DecodingScheduleException
+from schedule import Schedule
 
 class Decoder(RaptorR10):
     """
     Instances of this class take a known set of encoding symbols
     and id's and decodes the intermediate symbols.
 
-    To get the source symbols, just decoded the first k encoding
-    symbols
+    To get the source symbols use recover_source, which only encodes
+    the source symbols that were not received
+
+    Each symbol's row of a is packed and reduced against an echelon form
+    of the rows seen so far as it arrives, so checking whether decoding is
+    possible costs one row reduction per symbol instead of a full decoding
+    schedule per check.
+
+    With use_streaming symbols are also peeled as they arrive.  A symbol
+    has the intermediate symbols already known XORed out of it straight
+    away, and a row left with one unknown intermediate symbol resolves it
+    and is peeled out of every other row.  decode then only solves what
+    is left.  The work done while appending overlaps with reading the
+    symbols, but R10 rows seldom get down to one unknown before most
+    symbols are in, so most of the work usually still happens in decode.
     """
 
-    def __init__(self, k, symbols=None):
+    def __init__(self, k, symbols=None, use_streaming=False, **kwargs):
         """
         Arguments:
         block -- Block with set k and symbol size.  Each of the block's
@@ -33,13 +53,57 @@ class Decoder(RaptorR10):
         Keyword Arguments:
         symbols -- Optional list of symbols to initialize the
                    decoder with.
+        use_streaming -- Boolean peel symbols as they are appended
+
+        Any other keyword arguments are passed on to RaptorR10
         """
+        self.use_streaming = use_streaming
+
+        # The ldpc and hdpc rows are only built once a symbol arrives
+        self.constraint_rows = None
+
         # Use parent class to gen parameters
-        super(Decoder, self).__init__(k)
+        super(Decoder, self).__init__(k, **kwargs)
         if symbols is None:
             symbols = []
         self.symbols = symbols
 
+    def _get_symbols(self):
+        return self._symbols
+
+    def _set_symbols(self, symbols):
+        """
+        Replaces the symbols held and forgets everything worked out from
+        the old ones
+        """
+        self._symbols = symbols
+
+        # Packed lt rows of a for the ESIs in lt_esis, built as symbols
+        # arrive, and their echelon form along with the constraint rows
+        self.lt_rows = []
+        self.lt_esis = []
+        self.echelon = None
+
+        # Set by decode
+        self.i_symbols = None
+
+        # Intermediate symbol -> its numpy array once resolved by peeling
+        self.resolved = {}
+
+        # Rows still being peeled as [set of unknown intermediate
+        # symbols, numpy array or None while the row's data is zero,
+        # True once the array is the row's own copy].  Rows keep the
+        # appended symbol itself until something is XORed into them.
+        # in_column[c] holds the keys of the rows with c unknown.
+        self.pending = None
+        self.in_column = None
+        self.peeled_rows = 0
+
+        for symbol in symbols:
+            self.peel(symbol)
+
+    symbols = property(_get_symbols, _set_symbols)
+
     def append(self, symbol_tuple):
         """
         Appends another symbol to the decoder.
@@ -48,12 +112,229 @@ class Decoder(RaptorR10):
         symbol_tuple -- Should be a 2 tuple (Integer id, Bitarray symbol)
         """
         self.symbols.append(symbol_tuple)
+        self.peel(symbol_tuple)
         return self.can_decode()
 
+    def peel(self, symbol_tuple):
+        """
+        Peels a symbol against the intermediate symbols already resolved
+        and resolves any that become known.  Does nothing unless
+        use_streaming is set.
+
+        Arguments:
+        symbol_tuple -- 2 tuple (Integer id, numpy array)
+        """
+        if not self.use_streaming:
+            return
+        if self.pending is None:
+            # The ldpc and hdpc rows start out known to be zero
+            self.pending = {}
+            self.in_column = [set() for column in xrange(self.l)]
+            for row in inactivation.sparse_rows(self.constraints()):
+                self.add_row(set(row), None)
+
+        id, symbol = symbol_tuple
+        unknown = set()
+        for column in self.lt_indices(id):
+            unknown ^= set([column])
+
+        data, owned = symbol, False
+        for column in [column for column in unknown if column in self.resolved]:
+            if owned:
+                numpy.bitwise_xor(self.resolved[column], data, data)
+            else:
+                data, owned = numpy.bitwise_xor(self.resolved[column], data), True
+            unknown.remove(column)
+        self.add_row(unknown, data, owned)
+
+    def add_row(self, unknown, data, owned=False):
+        """
+        Starts peeling a row and resolves whatever it makes known
+
+        Arguments:
+        unknown -- Set of the row's unresolved intermediate symbols
+        data    -- numpy array of the row's symbol or None if zero
+
+        Keyword Arguments:
+        owned -- Boolean data may be written to.  Otherwise it is copied
+            before anything is XORed into it.
+        """
+        if not unknown:
+            return
+        key = self.peeled_rows
+        self.peeled_rows += 1
+        self.pending[key] = [unknown, data, owned]
+        for column in unknown:
+            self.in_column[column].add(key)
+
+        ripple = [key]
+        while ripple:
+            key = ripple.pop()
+            if key not in self.pending or len(self.pending[key][0]) != 1:
+                continue
+            unknown, data, owned = self.pending.pop(key)
+            column = unknown.pop()
+            self.in_column[column].discard(key)
+            if data is None:
+                data = numpy.zeros_like(self.symbols[0][1])
+            self.resolved[column] = data
+
+            # Peel the new symbol out of every row waiting on it
+            for other in self.in_column[column]:
+                row = self.pending[other]
+                if row[1] is None:
+                    row[1] = data
+                elif row[2]:
+                    numpy.bitwise_xor(data, row[1], row[1])
+                else:
+                    row[1], row[2] = numpy.bitwise_xor(data, row[1]), True
+                row[0].discard(column)
+                if len(row[0]) == 1:
+                    ripple.append(other)
+                elif not row[0]:
+                    del self.pending[other]
+            self.in_column[column] = set()
+
+    def sync(self, verify=False):
+        """
+        Packs and reduces the rows of any symbols not yet seen.  Symbols
+        are expected to be appended, so normally only the last symbol
+        already packed is checked against lt_esis.  If symbols was edited
+        some other way everything is worked out again from symbols.
+
+        Keyword Arguments:
+        verify -- Boolean check the ESIs of every symbol already packed
+        """
+        symbols = self.symbols
+        packed = len(self.lt_esis)
+        if verify:
+            stale = [id for id, symbol in symbols[:packed]] != self.lt_esis
+        else:
+            stale = len(symbols) < packed or (packed and symbols[packed - 1][0] != self.lt_esis[-1])
+        if stale:
+            self.symbols = symbols
+
+        if self.echelon is None:
+            if self.constraint_rows is None:
+                self.constraint_rows = self.constraints()
+            self.echelon = Echelon(self.l)
+            for row in self.constraint_rows.data:
+                self.echelon.add(row)
+
+        new = [id for id, symbol in symbols[len(self.lt_esis):]]
+        if not new:
+            return
+        indices, degrees = self.lt_indices_batch(new)
+        self.lt_esis.extend(new)
+        for row in BitMatrix.from_padded(indices, self.l).data:
+            self.lt_rows.append(row)
+            if not self.echelon.full():
+                self.echelon.add(row)
+
+    def can_decode(self):
+        """
+        Determines whether or not decoding can take place.  Decoding is
+        possible exactly when a has full rank l.
+
+        Returns true for success, false otherwise
+        """
+        self.sync()
+        return self.echelon.full()
+
+    def a(self):
+        """
+        Stacks the constraint rows with the lt rows packed by sync.  Only
+        appended symbols are picked up here, decode and calculate_i_symbols
+        check every ESI before a is needed.
+
+        Returns a BitMatrix representing a
+        """
+        self.sync()
+        data = numpy.vstack([self.constraint_rows.data] + self.lt_rows)
+        return BitMatrix(len(data), self.l, data)
+
     def decode(self):
         """
         Nice way of saying decode the intermediate symbols
         Difference between the encoder and the decoder
         is that you choose when to decode with the decoder
+
+        The echelon form kept by sync only decides can_decode.  The
+        schedule is still built by eliminating a from scratch, since
+        replaying the echelon's dense row operations would take several
+        times the symbol XORs of the sparse schedule.
         """
+        self.sync(verify=True)
+        if not self.echelon.full():
+            raise RaptorR10DecodingScheduleException(
+                "The %s symbols held do not determine the intermediate symbols" %
+                len(self.symbols)
+            )
+        if self.use_streaming:
+            self.solve_pending()
+        else:
+            super(Decoder, self).calculate_i_symbols()
+
+    def calculate_i_symbols(self):
+        """
+        Checks the rows packed still match the symbols held before
+        decoding them all at once
+        """
+        self.sync(verify=True)
         super(Decoder, self).calculate_i_symbols()
+
+    def solve_pending(self):
+        """
+        Solves the rows left over from peeling for the intermediate
+        symbols peeling did not resolve
+        """
+        columns = [column for column in xrange(self.l) if column not in self.resolved]
+        index = dict((column, n) for n, column in enumerate(columns))
+
+        # Rows whose data is still zero go first so they replay as zeros
+        keys = sorted(self.pending, key=lambda key: self.pending[key][1] is not None)
+        zeros = sum(1 for key in keys if self.pending[key][1] is None)
+        rows = [sorted(index[column] for column in self.pending[key][0]) for key in keys]
+
+        symbols = numpy.empty((self.l, len(self.symbols[0][1])), dtype=self.symbols[0][1].dtype)
+        for column, data in self.resolved.iteritems():
+            symbols[column] = data
+
+        if columns:
+            schedule = self.solve_sparse(rows, len(columns), Schedule(len(columns), len(rows)))
+            if zeros == len(keys):
+                # Nothing but zeros went into the rows left
+                symbols[columns] = 0
+            else:
+                D = arena.allocate(
+                    [self.pending[key][1] for key in keys[zeros:]], zeros, schedule.scratch
+                )
+                solved = self.replay(schedule, D, zeros, len(columns))
+                symbols[columns] = solved.take(numpy.arange(len(columns)))
+
+        self.i_symbols = arena.PermutedRows(symbols, range(self.l))
+
+    def recover_source(self):
+        """
+        Finds the k source symbols.  Source symbols that were received are
+        returned as they are, without a copy, and only the missing ones are
+        encoded from the intermediate symbols.  The intermediate symbols
+        are decoded first if decode has not been called, unless every
+        source symbol was received in which case nothing is decoded.
+
+        Returns a list of k numpy arrays
+        """
+        source = {}
+        for id, symbol in self.symbols:
+            if id < self.k and id not in source:
+                source[id] = symbol
+
+        missing = [id for id in xrange(self.k) if id not in source]
+        if missing:
+            if self.i_symbols is None:
+                # Subclasses such as StringDecoder give decode another
+                # meaning
+                Decoder.decode(self)
+            for id, symbol in zip(missing, self.ltenc_batch(missing)):
+                source[id] = symbol
+        return [source[id] for id in xrange(self.k)]
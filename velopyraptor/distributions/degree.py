@@ -14,6 +14,8 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import numpy
+
 # Implemented based on http://tools.ietf.org/html/rfc5053#section-5.4.4.4
 # Maps a range of numbers to degrees (not temperature. actually, not sure 
 # what it means
@@ -24,6 +26,10 @@ F = [0, 10241, 491582, 712794, 831695, 948446, 1032189, 1048576]
 D = [None, 1, 2, 3, 4, 10, 11, 40]
 between_range = lambda start, end, v: start <= v < end
 
+# F and D as arrays for R10_array
+F_ARRAY = numpy.array(F, dtype='int64')
+D_ARRAY = numpy.array([0] + D[1:], dtype='int64')
+
 def R10(v):
     """
     Returns the R10 degree for v
@@ -38,3 +44,15 @@ def R10(v):
             return D[i]
 
     raise Exception("Degree not found for v %s" % v)
+
+def R10_array(v):
+    """
+    R10 for a numpy array of v at once.  Searches F instead of
+    scanning it.
+
+    Returns a numpy array of int64 degrees
+    """
+    v = numpy.asarray(v, dtype='int64')
+    if v.size and (v.min() < V_MIN or v.max() >= V_MAX):
+        raise Exception("Recieved v outside of %s and %s" % (V_MIN, V_MAX))
+    return D_ARRAY[numpy.searchsorted(F_ARRAY, v, side='right')]
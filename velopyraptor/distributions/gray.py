@@ -14,40 +14,30 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import math
-import operator
+# Grays with a given number of bits, keyed by that number of bits.
+# Filled in by with_ones as longer sequences are needed
+SEQUENCES = {}
 
-def generate_grays_group_by_nbits(n):
+def with_ones(ones, count):
     """
-    Computes the gray sequence and groups elements by the number of bits they
-    contain.
-    """
-
-    def count_ones(n):
-        """
-        Quick function to sum the number of 1's in a binary
-        represention of a number
-
-        @ TODO -- Maybe increase to 64 bits instead of 32
-        """
-        s = 0
-        mask = 1
-        for i in xrange(32):
-            if (mask << i) & n:
-                s += 1
-        return s
+    Finds the first count elements of the gray sequence that have exactly
+    ones bits set.  Large k need grays well past any fixed table so the
+    sequence is extended on demand.
 
-    # Function that xors a number by half of itself
-    gray = lambda i: i ^ int(math.floor(i / 2.0))
+    Arguments:
+    ones  -- Integer number of bits set
+    count -- Integer number of grays wanted
 
-    # Create a list 
-    grouped_grays = [[] for i in xrange(64)]
-    for i in xrange(n):
-        g = gray(i)
-        bits = count_ones(g)
-        grouped_grays[bits].append(g)
-    return grouped_grays
-
-# Create a sequence of grays grouped by the number of bits in each gray
-# The index in the the list indicates the number of bits
-SEQUENCE = generate_grays_group_by_nbits(8192)
+    Returns a list of integers
+    """
+    sequence = SEQUENCES.get(ones)
+    if sequence is None or len(sequence) < count:
+        sequence = []
+        i = 0
+        while len(sequence) < count:
+            g = i ^ (i >> 1)
+            if bin(g).count('1') == ones:
+                sequence.append(g)
+            i += 1
+        SEQUENCES[ones] = sequence
+    return sequence[:count]
@@ -17,6 +17,8 @@ limitations under the License.
 import math
 import operator
 
+import numpy
+
 V0_R10 = [
     251291136, 3952231631, 3370958628, 4070167936, 123631495, 3351110283,
     3218676425, 2011642291, 774603218, 2402805061, 1004366930,
@@ -123,3 +125,21 @@ def R10(X, i, m):
     This generator is specified in rfc 5053
     """
     return operator.xor(V0_R10[int((X + i) % 256)], V1_R10[int((math.floor(X/256) + i) % 256)]) % m
+
+# The tables as arrays for R10_array
+V0 = numpy.array(V0_R10, dtype='int64')
+V1 = numpy.array(V1_R10, dtype='int64')
+
+def R10_array(X, i, m):
+    """
+    R10 for a numpy array of X at once
+
+    Arguments:
+    X -- numpy array of non negative integers
+    i -- Integer
+    m -- Integer or numpy array of integers
+
+    Returns a numpy array of int64s
+    """
+    X = numpy.asarray(X, dtype='int64')
+    return (V0[(X + i) % 256] ^ V1[(X // 256 + i) % 256]) % m
@@ -0,0 +1,100 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import numpy
+
+from bitmatrix import BITS, words_for
+
+class Echelon(object):
+
+    """
+    Keeps the rows added to it in reduced row echelon form over GF(2).
+
+    Every basis row has a one in its own pivot column and zeros in the pivot
+    columns of every other basis row.  Reducing a new row against the basis
+    is then a single XOR of the basis rows whose pivot columns the new row
+    has ones in, which costs O(columns^2 / 64) word operations.
+    """
+
+    def __init__(self, columns):
+        """
+        Arguments:
+        columns -- Integer number of columns in each row
+        """
+        self.columns = columns
+        self.width = words_for(columns)
+        self.rank = 0
+
+        # There can never be more independent rows than columns
+        self.basis = numpy.zeros((columns, self.width), dtype='uint64')
+
+        # Word and bit of the pivot column of each basis row
+        self.pivot_words = numpy.zeros(columns, dtype='intp')
+        self.pivot_bits = numpy.zeros(columns, dtype='uint64')
+
+    def full(self):
+        """
+        Returns True once the rows added span every column
+        """
+        return self.rank == self.columns
+
+    def reduce(self, row):
+        """
+        Reduces a row against the basis
+
+        Arguments:
+        row -- numpy array of words
+
+        Returns a new numpy array of words with zeros in every pivot column
+        """
+        row = numpy.array(row, dtype='uint64')
+        rank = self.rank
+        if rank:
+            hits = (row[self.pivot_words[:rank]] & self.pivot_bits[:rank]) != 0
+            if hits.any():
+                row ^= numpy.bitwise_xor.reduce(self.basis[:rank][hits], axis=0)
+        return row
+
+    def add(self, row):
+        """
+        Adds a row to the basis if it is independent of the rows
+        already added
+
+        Arguments:
+        row -- numpy array of words
+
+        Returns True if the rank grew
+        """
+        row = self.reduce(row)
+        nonzero = numpy.flatnonzero(row)
+        if not nonzero.size:
+            return False
+
+        # The lowest remaining one becomes the new pivot
+        word = int(nonzero[0])
+        value = int(row[word])
+        bit = BITS[(value & -value).bit_length() - 1]
+
+        # Clear the new pivot column out of the existing basis rows
+        rank = self.rank
+        rows = numpy.flatnonzero(self.basis[:rank, word] & bit)
+        if rows.size:
+            self.basis[rows] ^= row
+
+        self.basis[rank] = row
+        self.pivot_words[rank] = word
+        self.pivot_bits[rank] = bit
+        self.rank += 1
+        return True
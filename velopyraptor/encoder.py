@@ -63,7 +63,7 @@ class EncoderHard(RaptorR10):
 
         Returns list of bit arrays representing intermediate symbols
         """
-        a = self.a()
+        a = self.a().to_bitarrays()
         ai = matrix.inverse(a)
         d = self.calculate_d()
         return matrix.multiply(ai, d)        
@@ -26,16 +26,22 @@ class FileDecoder(object):
     the original file
     """
 
-    def __init__(self, input_dir, output_file):
+    def __init__(self, input_dir, output_file, threads=1, streaming=False):
         """
         Initializes an instance of FileDecoder
 
         Arguments:
         input_dir   -- Directory containing blocks and shares to decode
         output_file -- Target file to assemble decoded blocks into
+
+        Keyword Arguments:
+        threads -- Integer number of threads to decode with
+        streaming -- Boolean peel shares as they are read, see Decoder
         """
         self.input_dir = input_dir
         self.output_file = output_file
+        self.threads = threads
+        self.streaming = streaming
         self.stats = {
             'io_time': 0,
             'decoding_time': 0
@@ -141,7 +147,7 @@ class FileDecoder(object):
             # For each file in the block directory(excluding meta) read each
             # share.  Each will be an encoding symbol
 
-            decoder = Decoder(k)
+            decoder = Decoder(k, threads=self.threads, use_streaming=self.streaming)
             read_symbols = 0
 
             for _file in os.listdir(blockdir):
@@ -180,26 +186,19 @@ class FileDecoder(object):
             if not can_decode:
                 self.exit("A decoding schedule was not possible with the symbols provided.")
 
-            # Instruct decoder to calculate intermediate symbols from
-            # known encoding symbols
+            # Decode the intermediate symbols from the known encoding
+            # symbols and encode the source symbols that were not read.
+            # The first k source symbols == the first k encoding symbols
             self.start_timer()
-            decoder.decode()
+            source = decoder.recover_source()
             self.add_time(self.stop_timer(), 'decoding_time')
 
-            # Steam source symbol output by encoding the first
-            # k encoded symbols.
-            # The first k source symbols == the first k encoding symbols
+            self.start_timer()
             target = open(self.output_file, 'ab')
-            for i in xrange(k):
-
-                self.start_timer()
-                s = decoder.next()[1]
-                self.add_time(self.stop_timer(), 'decoding_time')
-
-                self.start_timer()
+            for s in source:
                 s.tofile(target)
-                self.add_time(self.stop_timer(), 'io_time')
             target.close()
+            self.add_time(self.stop_timer(), 'io_time')
         
             # Padding should only be on the last block but we check anyway
             # @TODO - Ensure file size is accurate before truncating
@@ -224,8 +223,10 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(prog="python file_decoder.py", description="Erasure decoding using Raptor R10")
     parser.add_argument('directory', help="Directory to decode")
     parser.add_argument('file', help="Output file")
+    parser.add_argument('--threads', default=1, type=int, help="Number of threads to decode with.(default 1)")
+    parser.add_argument('--streaming', default=False, action="store_true", help="Peel shares as they are read.")
     args = parser.parse_args()
-    decoder = FileDecoder(args.directory, args.file)
+    decoder = FileDecoder(args.directory, args.file, threads=args.threads, streaming=args.streaming)
     decoder.decode()
 
     print "Finished decoding directory %s into %s" % (args.directory, args.file)
@@ -28,7 +28,7 @@ class FileEncoder(object):
     out the shares
     """
 
-    def __init__(self, k, s, m, input_file, output_dir, optimal=False):
+    def __init__(self, k, s, m, input_file, output_dir, optimal=False, threads=1):
         """
         Initializes an instance of a file encoder
 
@@ -38,6 +38,10 @@ class FileEncoder(object):
         m          -- Intger number of parity symbols
         input_file -- File to encode
         output_dir -- Directory to place encoded blocks and shares
+
+        Keyword Arguments:
+        optimal -- Boolean use optimal symbols when encoding
+        threads -- Integer number of threads to encode with
         """
         self.k = k
         self.s = s # Bytes
@@ -49,6 +53,7 @@ class FileEncoder(object):
             'encoding_time': 0
         }
         self.optimal = optimal
+        self.threads = threads
         self.t = None
 
     def start_timer(self):
@@ -133,7 +138,10 @@ class FileEncoder(object):
                 source_symbols = [(id, block[id]) for id in xrange(self.k)]
 
                 self.start_timer()
-                encoder = Encoder(self.k, source_symbols, use_optimal_esis=self.optimal)
+                encoder = Encoder(
+                    self.k, source_symbols,
+                    use_optimal_esis=self.optimal, threads=self.threads
+                )
                 self.add_time(self.stop_timer(), 'encoding_time')
 
                 # Write padding and k parameters that will be used
@@ -149,13 +157,12 @@ class FileEncoder(object):
                 # m is the number of parity blocks
                 # NOTE - We could start at k and produce k+m symbols there consisting
                 # entirely of parity blocks and be just as fine
-                for esi in xrange(self.k + self.m):
-                    # The encoder produces an (id, numpy array) tuple
-                    self.start_timer()
-                    esi, symbol = encoder.next()
-                    self.add_time(self.stop_timer(), 'encoding_time')
+                # The encoder produces (id, numpy array) tuples
+                self.start_timer()
+                symbols = encoder.take(self.k + self.m)
+                self.add_time(self.stop_timer(), 'encoding_time')
+                for esi, symbol in symbols:
                     symbol.tofile(os.path.join(dir_name, str(esi)))
-                    f.close()
 
                 block_name += 1
                 self.start_timer()
@@ -185,9 +192,10 @@ if __name__ == '__main__':
     parser.add_argument('--m', default=4, type=int, help="Number of parity blocks to compute.(default 4)")
     parser.add_argument('--s', default=(1 * 1024 * 1024), type=int, help="Symbol size in bytes(default 1 * 1024 * 1024)")
     parser.add_argument('-o', '--o', default=False, action="store_true", help="Use optimal symbols when encoding.")
+    parser.add_argument('--threads', default=1, type=int, help="Number of threads to encode with.(default 1)")
 
     args = parser.parse_args()
-    encoder = FileEncoder(args.k, args.s, args.m, args.file, args.directory, optimal=args.o)
+    encoder = FileEncoder(args.k, args.s, args.m, args.file, args.directory, optimal=args.o, threads=args.threads)
     encoder.encode()
 
     print "Finished encoding %s into directory %s" % (args.file, args.directory)
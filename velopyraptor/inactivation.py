@@ -0,0 +1,162 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Inactivation decoding of matrix A.
+
+Phase 1 of rfc 5053 repeatedly picks a row of V with the fewest ones,
+takes one of its columns as a pivot and moves the rest into U.  That is
+peeling with inactivation, but done on the packed matrix it costs several
+passes over every row of A for each pivot.  Here the same process runs on
+lists of the columns of each row so a pivot only touches the rows that
+share its columns.  Nothing is XORed while peeling.  Afterwards the pivot
+columns are cleared out of every row in one sweep, leaving a small dense
+system in the inactive columns that is solved with packed words.
+"""
+import numpy
+
+from bitmatrix import BITS, WORD_BITS, unpack, words_for
+from buckets import DegreeBuckets
+from components import ComponentTracker
+import pivoting
+
+# Rows of A unpacked to booleans at a time by sparse_rows
+CHUNK_ROWS = 1024
+
+WORD_MASK = (1 << WORD_BITS) - 1
+
+def sparse_rows(a):
+    """
+    Lists the columns set in each row of a
+
+    Arguments:
+    a -- BitMatrix without a column permutation
+
+    Returns a list with an ascending list of integer columns per row
+    """
+    rows = []
+    for start in xrange(0, len(a), CHUNK_ROWS):
+        bits = unpack(a.data[start:start + CHUNK_ROWS], a.columns)
+        row_ids, ones = numpy.nonzero(bits)
+        bounds = numpy.searchsorted(row_ids, numpy.arange(1, len(bits)))
+        rows.extend([part.tolist() for part in numpy.split(ones, bounds)])
+    return rows
+
+def peel(rows, columns, rule=None):
+    """
+    Orders the columns into pivots and inactive columns
+
+    Each step takes a row chosen by a rule from pivoting.py, solves one of
+    its active columns and inactivates the rest.  The rfc 5053 rule takes
+    a row with the fewest columns still active and, for two active columns,
+    one from the largest component of the graph those rows form, which
+    keeps the number of inactive columns down.
+
+    Arguments:
+    rows    -- List with a list of integer columns per row
+    columns -- Integer number of columns
+
+    Keyword Arguments:
+    rule -- Pivoting to choose pivots with.  Defaults to the rfc rule.
+
+    Returns tuple (list of (row, column) pivots in the order found, list
+    of inactive columns) or None when the rows can not cover every column
+    """
+    in_column = [[] for column in xrange(columns)]
+    for row, ones in enumerate(rows):
+        for column in ones:
+            in_column[column].append(row)
+
+    active = [True] * columns
+    components = ComponentTracker()
+    buckets = DegreeBuckets([len(ones) for ones in rows], components=components)
+
+    if rule is None:
+        rule = pivoting.get('rfc')
+    v = pivoting.SparseV(rows, in_column, active, buckets, components)
+
+    pivots = []
+    inactive = []
+    remaining = columns
+    while remaining:
+        if buckets.minimum()[0] is None:
+            return None
+
+        row, pivot = rule.choose(v)
+        ones = v.columns(row)
+        if pivot is None:
+            pivot = ones[0]
+        buckets.remove(row)
+        v.remove(row)
+        for column in ones:
+            active[column] = False
+            buckets.decrement(in_column[column])
+
+        pivots.append((row, pivot))
+        inactive.extend([column for column in ones if column != pivot])
+        remaining -= len(ones)
+
+    return pivots, inactive
+
+def to_words(values, columns):
+    """
+    Packs integers holding rows of bits into rows of words
+
+    Arguments:
+    values  -- List of integers.  Bit c is column c.
+    columns -- Integer number of columns
+
+    Returns a (len(values) x words_for(columns)) numpy array of uint64s
+    """
+    words = numpy.zeros((len(values), words_for(columns)), dtype='uint64')
+    for row, value in enumerate(values):
+        word = 0
+        while value:
+            words[row, word] = value & WORD_MASK
+            value >>= WORD_BITS
+            word += 1
+    return words
+
+def eliminate_dense(words, columns, schedule, first):
+    """
+    Reduces the dense system left after peeling to the identity with
+    Gauss-Jordan elimination on packed rows.  Rows past the first columns
+    rows are only kept as spare pivots.
+
+    Arguments:
+    words    -- (rows x words_for(columns)) numpy array of uint64s
+    columns  -- Integer number of inactive columns
+    schedule -- Schedule to record the operations in
+    first    -- Integer row of a holding row 0 of words
+
+    Returns False if the rows are of less rank than columns
+    """
+    for column in xrange(columns):
+        word, bit = column >> 6, BITS[column & 63]
+        hits = numpy.flatnonzero(words[column:, word] & bit)
+        if not hits.size:
+            return False
+
+        pivot = column + int(hits[0])
+        if pivot != column:
+            words[[column, pivot]] = words[[pivot, column]]
+            schedule.exchange_row(first + column, first + pivot)
+
+        rows = numpy.flatnonzero(words[:, word] & bit)
+        rows = rows[rows != column]
+        if rows.size:
+            words[rows] ^= words[column]
+            for row in rows.tolist():
+                schedule.xor(first + row, first + column)
+    return True
@@ -0,0 +1,79 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Runs work on column ranges of symbols in a pool of threads.  Every
+operation on symbols works column by column so the same schedule can be
+replayed on each range of columns independently.  numpy releases the GIL
+while it XORs so the threads run in parallel.
+"""
+import threading
+from multiprocessing.pool import ThreadPool
+
+# Ranges narrower than this are not worth handing to another thread
+MIN_RANGE_BYTES = 64 * 1024
+
+# Pools by number of threads.  Pools are kept for the life of the process.
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+def pool(threads):
+    """
+    Returns the shared ThreadPool with threads threads
+    """
+    with POOLS_LOCK:
+        if threads not in POOLS:
+            POOLS[threads] = ThreadPool(threads)
+        return POOLS[threads]
+
+def ranges(columns, itemsize, threads):
+    """
+    Splits the columns of symbols into at most threads contiguous ranges
+    of nearly equal width
+
+    Arguments:
+    columns  -- Integer number of columns in a symbol
+    itemsize -- Integer bytes per column
+    threads  -- Integer number of threads available
+
+    Returns a list of slices
+    """
+    count = min(threads, columns * itemsize // MIN_RANGE_BYTES)
+    if count <= 1:
+        return [slice(0, columns)]
+
+    # Keep range boundaries on 64 byte cache lines
+    align = max(64 // itemsize, 1)
+    width = -(-columns // count)
+    width = -(-width // align) * align
+    return [
+        slice(start, min(start + width, columns))
+        for start in xrange(0, columns, width)
+    ]
+
+def run(function, parts, threads):
+    """
+    Calls function once for each part, across threads when there is
+    more than one part
+
+    Arguments:
+    function -- Function of one argument
+    parts    -- List of arguments, usually from ranges
+    threads  -- Integer number of threads available
+    """
+    if len(parts) == 1 or threads <= 1:
+        for part in parts:
+            function(part)
+    else:
+        pool(threads).map(function, parts)
@@ -0,0 +1,269 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Rules for choosing the pivot of each step of phase 1 in
+http://tools.ietf.org/html/rfc5053#section-5.5.2.2
+
+Each step takes a row of V, solves one of its columns and moves the rest
+of the row's columns into U.  Which row and column are taken decides how
+many rows the pivot is XORed into and how wide U grows, so it sets the
+number of symbol XORs in the schedule.
+
+A rule sees V through a view with the methods
+
+    minimum()      -- tuple (fewest ones r of any row, set of those rows)
+    rows_with(r)   -- set of the rows with r ones in V
+    columns(row)   -- list of the columns of V a row has a one in
+    count(column)  -- number of rows of V with a one in column
+    degree(row)    -- the row's number of ones before phase 1 started
+    largest()      -- a row from the largest component of the graph of
+                      rows with two ones, see ComponentTracker
+    component()    -- list of every row of that component
+
+PackedV is the view of the packed matrix used by decoding_schedule and
+SparseV the view inactivation.peel keeps.
+"""
+import heapq
+
+# Rows with one more than the fewest ones the Markowitz rule searches.
+# Searching a few rows finds nearly as good a pivot as searching them all
+# (Zlatev's restricted Markowitz search) at a fraction of the cost.
+MARKOWITZ_SEARCH = 8
+
+class Pivoting(object):
+
+    """
+    Chooses the pivot of a step of phase 1.  Subclasses implement choose.
+    """
+
+    name = None
+
+    def choose(self, v):
+        """
+        Arguments:
+        v -- View of V
+
+        Returns tuple (row, column).  column may be None to let the caller
+        take any of the row's columns.
+        """
+        raise NotImplementedError
+
+class RfcPivoting(Pivoting):
+
+    """
+    The rule of rfc 5053.  Takes a row with the fewest ones, from the
+    largest component when that is two ones and otherwise with the lowest
+    original degree.
+    """
+
+    name = 'rfc'
+
+    def choose(self, v):
+        r, rows = v.minimum()
+        if r == 2:
+            return v.largest(), None
+        return min(rows, key=lambda row: (v.degree(row), row)), None
+
+def candidates(v, r, rows):
+    """
+    Narrows the rows with r ones to those the rfc rule would take from.
+    Rows with two ones are taken from the largest component since taking
+    every edge of a component inactivates a single column.
+    """
+    if r == 2:
+        return v.component()
+    return rows
+
+class MarkowitzPivoting(Pivoting):
+
+    """
+    Takes the row and column with the lowest Markowitz count
+    (r - 1) * (c - 1), the ones the step adds to the rest of the matrix.
+    The lowest MARKOWITZ_SEARCH rows with one more than the fewest ones
+    are searched too so a column shared by few rows can win over keeping
+    U narrow.
+    """
+
+    name = 'markowitz'
+
+    def choose(self, v):
+        r, rows = v.minimum()
+        best = None
+        wider = heapq.nsmallest(MARKOWITZ_SEARCH, v.rows_with(r + 1))
+        for weight, rows in ((r, candidates(v, r, rows)), (r + 1, wider)):
+            for row in rows:
+                for column in v.columns(row):
+                    c = v.count(column)
+                    key = ((weight - 1) * (c - 1), weight, c, v.degree(row), row, column)
+                    if best is None or key < best:
+                        best = key
+        return best[4], best[5]
+
+class MinXorPivoting(Pivoting):
+
+    """
+    Takes a row with the fewest ones from the rows the rfc rule takes
+    from, so U grows about as much as under the rfc rule, and the column
+    of those rows predicted to need the fewest symbol XORs.  The pivot row
+    is XORed once into every other row of V with a one in its column.
+    """
+
+    name = 'min-xor'
+
+    def choose(self, v):
+        r, rows = v.minimum()
+        best = None
+        for row in candidates(v, r, rows):
+            for column in v.columns(row):
+                key = (v.count(column), v.degree(row), row, column)
+                if best is None or key < best:
+                    best = key
+        return best[2], best[3]
+
+class PackedV(object):
+
+    """
+    View of V while decoding_schedule reduces the packed matrix a.  V is
+    rows i through m - 1 and columns i through l - u - 1.
+    """
+
+    def __init__(self, a, buckets, components, degrees, l):
+        """
+        Arguments:
+        a          -- BitMatrix being reduced
+        buckets    -- DegreeBuckets tracking the rows of V
+        components -- ComponentTracker following the rows with two ones
+        degrees    -- List of original row degrees
+        l          -- Integer number of columns of a
+        """
+        self.a = a
+        self.buckets = buckets
+        self.components = components
+        self.degrees = degrees
+        self.l = l
+        self.i = 0
+        self.u = 0
+        self.counts = {}
+
+    def step(self, i, u):
+        """
+        Moves on to the V of step i with u columns in U
+        """
+        self.i, self.u = i, u
+        self.counts = {}
+
+    def minimum(self):
+        return self.buckets.minimum()
+
+    def rows_with(self, r):
+        if r < len(self.buckets.buckets):
+            return self.buckets.buckets[r]
+        return set()
+
+    def columns(self, row):
+        return self.a.ones(row, self.i, self.l - self.u)
+
+    def count(self, column):
+        if column not in self.counts:
+            self.counts[column] = len(self.a.column(column, self.i, len(self.a)))
+        return self.counts[column]
+
+    def degree(self, row):
+        return self.degrees[row]
+
+    def largest(self):
+        a, i, stop = self.a, self.i, self.l - self.u
+
+        def columns_of(row):
+            # Packed columns never move so they make stable vertices
+            return [a.order[column] for column in a.ones(row, i, stop)]
+
+        return self.components.largest(columns_of)
+
+    def component(self):
+        a, i, stop = self.a, self.i, self.l - self.u
+        return self.components.largest_rows(
+            lambda row: [a.order[column] for column in a.ones(row, i, stop)]
+        )
+
+class SparseV(object):
+
+    """
+    View of V while inactivation.peel runs on lists of each row's columns
+    """
+
+    def __init__(self, rows, in_column, active, buckets, components):
+        """
+        Arguments:
+        rows       -- List with a list of integer columns per row
+        in_column  -- List with a list of the rows of each column
+        active     -- List of booleans, True for the columns still in V
+        buckets    -- DegreeBuckets tracking the rows of V
+        components -- ComponentTracker following the rows with two ones
+        """
+        self.rows = rows
+        self.active = active
+        self.buckets = buckets
+        self.components = components
+        self.counts = [len(column_rows) for column_rows in in_column]
+
+    def remove(self, row):
+        """
+        Follows a row leaving V as a pivot
+        """
+        counts = self.counts
+        for column in self.rows[row]:
+            counts[column] -= 1
+
+    def minimum(self):
+        return self.buckets.minimum()
+
+    def rows_with(self, r):
+        if r < len(self.buckets.buckets):
+            return self.buckets.buckets[r]
+        return set()
+
+    def columns(self, row):
+        active = self.active
+        return [column for column in self.rows[row] if active[column]]
+
+    def count(self, column):
+        return self.counts[column]
+
+    def degree(self, row):
+        return len(self.rows[row])
+
+    def largest(self):
+        return self.components.largest(self.columns)
+
+    def component(self):
+        return self.components.largest_rows(self.columns)
+
+STRATEGIES = dict((p.name, p) for p in [
+    RfcPivoting(),
+    MarkowitzPivoting(),
+    MinXorPivoting(),
+])
+
+def get(name):
+    """
+    Looks up a pivoting rule by name
+
+    Arguments:
+    name -- String name such as 'markowitz'
+
+    Returns a Pivoting.  Raises KeyError for unknown names.
+    """
+    return STRATEGIES[name]
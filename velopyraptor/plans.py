@@ -0,0 +1,187 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Stores encoding plans on disk.  An encoding plan is the decoding schedule
+for the source symbols (ESIs 0..k-1) of a given k, which never changes for
+a given set of schedule options.  Plans can be generated ahead of time with
+
+    python plans.py directory --min-k 4 --max-k 8192
+
+and are then loaded by every encoder when config.plan_directory is set.
+
+A plan file is a fixed header followed by the schedule as written by
+Schedule.tostring.  The header holds a magic string, the format version, k, l, m, the number
+of xors, a crc32 of the schedule options and a crc32 of everything after
+the header.
+"""
+import mmap
+import os
+import struct
+import zlib
+
+from schedule import COUNTS, Schedule
+
+MAGIC = 'VRPLAN\x00\x00'
+VERSION = 3
+
+# magic, version, k, l, m, number of xors, options crc, payload crc
+HEADER = struct.Struct('=8sIIIIIII')
+
+def crc(data):
+    """
+    Returns the unsigned crc32 of a string or buffer
+    """
+    return zlib.crc32(data) & 0xffffffff
+
+def path_for(directory, k, key):
+    """
+    Names the plan file for k and a set of schedule options
+
+    Arguments:
+    directory -- String directory holding plans
+    k         -- Integer number of source symbols
+    key       -- Tuple of schedule options from RaptorR10.schedule_key
+
+    Returns a string path
+    """
+    options = "-".join([str(option) for option in key])
+    return os.path.join(directory, "k%05d-%s.plan" % (k, options))
+
+def write(path, k, key, schedule):
+    """
+    Writes a schedule to path.  The file is written next to path and
+    renamed into place so readers never see a partial plan.
+
+    Arguments:
+    path     -- String path to write
+    k        -- Integer number of source symbols
+    key      -- Tuple of schedule options the schedule was built with
+    schedule -- Schedule for ESIs 0..k-1
+    """
+    payload = schedule.tostring()
+    header = HEADER.pack(
+        MAGIC, VERSION, k, len(schedule.c), len(schedule.d),
+        len(schedule), crc(repr(key)), crc(payload)
+    )
+
+    partial = "%s.%s.tmp" % (path, os.getpid())
+    with open(partial, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.rename(partial, path)
+
+def load(path, k, key):
+    """
+    Memory maps a plan file and checks it belongs to k and key.  The
+    schedule returned reads straight from the mapped file.
+
+    Arguments:
+    path -- String path to read
+    k    -- Integer number of source symbols
+    key  -- Tuple of schedule options wanted
+
+    Returns a Schedule or None if there is no valid plan at path
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if not valid(mapped, k, key):
+        mapped.close()
+        return None
+    return Schedule.fromstring(mapped, HEADER.size)
+
+def valid(mapped, k, key):
+    """
+    Checks a mapped plan file is whole and belongs to k and key
+
+    Arguments:
+    mapped -- mmap of a plan file
+    k      -- Integer number of source symbols
+    key    -- Tuple of schedule options wanted
+
+    Returns True if the plan can be used
+    """
+    if len(mapped) < HEADER.size + COUNTS.size:
+        return False
+    magic, version, plan_k, l, m, xors, options, checksum = \
+        HEADER.unpack(mapped[:HEADER.size])
+    if magic != MAGIC or version != VERSION:
+        return False
+    if plan_k != k or options != crc(repr(key)):
+        return False
+    if len(mapped) != HEADER.size + COUNTS.size + 4 * (l + m + 2 * xors):
+        return False
+    return crc(buffer(mapped, HEADER.size)) == checksum
+
+def generate(directory, ks, use_prepass=True, use_precomputation=False,
+             use_inactivation=False, pivoting='rfc'):
+    """
+    Builds and writes the plan for every k in ks
+
+    Arguments:
+    directory -- String directory to write plans to
+    ks        -- Iterable of integer k
+
+    Keyword Arguments:
+    use_prepass -- Boolean whether the plans use the prepass
+    use_precomputation -- Boolean whether the plans use the
+        precomputation of phases 3 and 4
+    use_inactivation -- Boolean whether the plans are built by
+        inactivation decoding
+    pivoting -- String name of the pivoting rule the plans use
+
+    Returns a list of the paths written
+    """
+    from raptor import RaptorR10
+
+    paths = []
+    for k in ks:
+        coder = RaptorR10(
+            k, use_prepass=use_prepass, use_precomputation=use_precomputation,
+            use_inactivation=use_inactivation, pivoting=pivoting
+        )
+        coder.symbols = [(esi, None) for esi in xrange(k)]
+        key = coder.schedule_key()
+        path = path_for(directory, k, key)
+        write(path, k, key, coder.decoding_schedule(coder.a()))
+        paths.append(path)
+    return paths
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python plans.py",
+        description="Generate raptor r10 encoding plans ahead of time"
+    )
+
+    parser.add_argument('directory', help="Directory to write plans to")
+    parser.add_argument('--min-k', default=4, type=int, help="Smallest k to generate.(default 4)")
+    parser.add_argument('--max-k', default=8192, type=int, help="Largest k to generate.(default 8192)")
+    parser.add_argument('--no-prepass', default=False, action="store_true", help="Generate plans without the prepass.")
+    parser.add_argument('--precomputation', default=False, action="store_true", help="Generate plans using the precomputation of phases 3 and 4.")
+    parser.add_argument('--inactivation', default=False, action="store_true", help="Generate plans by inactivation decoding.")
+    parser.add_argument('--pivoting', default='rfc', choices=['rfc', 'markowitz', 'min-xor'], help="Pivoting rule of the plans.(default rfc)")
+
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        os.makedirs(args.directory)
+
+    ks = xrange(args.min_k, args.max_k + 1)
+    for path in generate(args.directory, ks, not args.no_prepass, args.precomputation, args.inactivation, args.pivoting):
+        print "Wrote %s" % path
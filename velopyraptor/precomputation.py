@@ -0,0 +1,126 @@
+"""
+Copyright [2013] [James Absalon]
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Phases 3 and 4 of http://tools.ietf.org/html/rfc5053#section-5.5.2.2
+
+Clearing U_upper one set bit at a time costs one symbol XOR for every one
+in U_upper, about half of i * u.  Instead the u columns are split into
+groups of width columns (the "four russians" method).  Within a group each
+row of U_upper has a pattern of at most 2 ** width combinations of the
+group's symbols.  Each combination in use is built once in a scratch row
+and then XORed into every row with that pattern, costing one XOR per row
+per group plus the XORs spent building combinations.
+
+The combinations of a group are built one after the other in a single
+scratch row by walking them in Gray code order, so moving from one
+combination to the next mostly costs a single XOR.
+"""
+import numpy
+
+# Widest group tried.  Building every combination of a group costs about
+# 2 ** width XORs so wider groups only pay off for very tall U_upper.
+MAX_WIDTH = 10
+
+def patterns(bits, start, width):
+    """
+    Numbers the combination of a group of columns each row has
+
+    Arguments:
+    bits  -- (rows x u) numpy array of booleans
+    start -- Integer first column of the group
+    width -- Integer number of columns in the group
+
+    Returns a numpy array of one integer per row.  Bit b is set when the
+    row has a one in column start + b.
+    """
+    group = bits[:, start:start + width]
+    weights = 1 << numpy.arange(group.shape[1], dtype='int64')
+    return group.dot(weights)
+
+def inverse_gray(value):
+    """
+    Returns the position of value in the Gray code sequence
+    """
+    shift = value >> 1
+    while shift:
+        value ^= shift
+        shift >>= 1
+    return value
+
+def walk(used):
+    """
+    Orders the combinations with more than one bit in the order a scratch
+    row builds them
+
+    Arguments:
+    used -- Iterable of integer combinations
+
+    Returns a list of integer combinations
+    """
+    combined = [p for p in set(used) if p & (p - 1)]
+    return sorted(combined, key=inverse_gray)
+
+def walk_cost(steps):
+    """
+    Counts the XORs a scratch row needs to visit each combination of
+    steps in turn starting from zero
+
+    Arguments:
+    steps -- List of integer combinations from walk
+    """
+    xors = 0
+    previous = 0
+    for step in steps:
+        xors += bin(previous ^ step).count('1')
+        previous = step
+    return xors
+
+def cost(bits, width):
+    """
+    Counts the symbol XORs clearing U_upper takes with groups of width
+    columns
+
+    Arguments:
+    bits  -- (rows x u) numpy array of booleans
+    width -- Integer number of columns per group
+
+    Returns an integer
+    """
+    xors = 0
+    for start in xrange(0, bits.shape[1], width):
+        rows = patterns(bits, start, width)
+        used = rows[rows != 0]
+        xors += len(used) + walk_cost(walk(used.tolist()))
+    return xors
+
+def best_width(bits, max_width=MAX_WIDTH):
+    """
+    Finds the group width needing the fewest symbol XORs
+
+    Arguments:
+    bits -- (rows x u) numpy array of booleans
+
+    Keyword Arguments:
+    max_width -- Integer widest group to try
+
+    Returns tuple (width, xors).  width is None when XORing one set bit at
+    a time is no worse, in which case xors is the number of ones.
+    """
+    width, xors = None, int(bits.sum())
+    for candidate in xrange(2, min(max_width, bits.shape[1]) + 1):
+        candidate_xors = cost(bits, candidate)
+        if candidate_xors < xors:
+            width, xors = candidate, candidate_xors
+    return width, xors
@@ -15,20 +15,29 @@ limitations under the License.
 """
 import copy
 import math
+from array import array
 import matrix
-import networkx
 import numpy
 from bitarray import bitarray
 
+import arena
+import backends
 import config
+from bitmatrix import BitMatrix, popcount, unpack
+from buckets import DegreeBuckets
+from cache import LRUCache
+from context import CodingContext, Q
+from components import ComponentTracker
 import distributions.degree as degree
 import distributions.gray as gray
-import distributions.half as half
 import distributions.optimal_esi as optimal_esi
-import distributions.primes as primes
 import distributions.random as random
-from distributions.systematic_index import systematic_index
-from schedule import Schedule
+import inactivation
+import parallel
+import pivoting
+import plans
+import precomputation
+from schedule import Schedule, TYPECODE
 
 MIN_K = 4
 MAX_K = 8192
@@ -83,9 +92,23 @@ class RaptorR10(object):
     from the known encoding symbols and reduce a to an identity
     matrix.  The operations performed on a are then performed
     on the known symbols to produce the intermediate symbols
+
+    A schedule only depends on k, the ids of the symbols held and the
+    scheduling options, so schedules are shared between all instances
+    through schedule_cache.
     """
 
-    def __init__(self, k, use_prepass=True, use_optimal_esis=False):
+    # Process wide cache of decoding schedules keyed by
+    # (k, esis) + schedule_key().  Sizes are read from config when used.
+    schedule_cache = LRUCache(lambda: config.schedule_cache_size)
+
+    # Process wide cache of CodingContexts keyed by k
+    context_cache = LRUCache(lambda: config.context_cache_size)
+
+    def __init__(self, k, use_prepass=True, use_optimal_esis=False, threads=1,
+                 use_compiled_replay=False, backend=None,
+                 use_precomputation=False, use_inactivation=False,
+                 prepass_budget=None, pivoting=None):
         """
         Arguments:
         k -- Integer representing number of source symbols.
@@ -95,6 +118,28 @@ class RaptorR10(object):
         use_prepass -- Boolean Sets wether or not a prepass should be made
         use_optimal_esis -- Attempts to produce only symbols requiring
             the least amount of XORS.
+        threads -- Integer number of threads to split the columns of large
+            symbols across when decoding and encoding
+        use_compiled_replay -- Boolean replay schedules of large symbols
+            through a generated straight line function, up to
+            config.compiled_replay_max_operations live xors.  Worth it
+            for k that are decoded many times since compiling is slow.
+        backend -- Optional string name of the backend from backends.py
+            to replay schedules with, or 'auto'.  Defaults to
+            config.backend.  A named backend replaces the built in
+            replay so threads and use_compiled_replay no longer apply.
+            'auto' times the built in replay along with the backends.
+        use_precomputation -- Boolean clear U_upper with the
+            precomputation of phases 3 and 4 of rfc 5053 to save symbol
+            XORs at the cost of a few scratch rows
+        use_inactivation -- Boolean build schedules by inactivation
+            decoding, see inactivation_schedule.  Much faster to build
+            for large k.
+        prepass_budget -- Optional integer limit on the work the prepass
+            does, see prepass.  Defaults to config.prepass_budget.
+        pivoting -- Optional string name of the rule from pivoting.py
+            that chooses the pivots of phase 1.  Defaults to
+            config.pivoting.
         """
         self.set_params(k)
 
@@ -104,6 +149,21 @@ class RaptorR10(object):
         # Set optimal_symbols
         self.use_optimal_esis = use_optimal_esis
 
+        self.threads = threads
+        self.use_compiled_replay = use_compiled_replay
+        self.backend = backend
+        self.use_precomputation = use_precomputation
+        self.use_inactivation = use_inactivation
+        if prepass_budget is None:
+            prepass_budget = config.prepass_budget
+        self.prepass_budget = prepass_budget
+        if pivoting is None:
+            pivoting = config.pivoting
+        self.pivoting = pivoting
+
+        # Counts from the last prepass
+        self.prepass_stats = {}
+
         # Initialized current id to 0 - this will be incremented when
         # next() is called
         self.current_id = 0
@@ -111,6 +171,12 @@ class RaptorR10(object):
         # this should be a list tuples consisting of (id, content)
         self.symbols = []
 
+        # Tuple (esis, Schedule) of the last schedule built successfully
+        self.last_schedule = None
+
+        # Counts from the last run of calculate_i_symbols
+        self.schedule_stats = {}
+
     def _get_next_id(self):
         """
         Returns the next id to produce the next encoded symbol
@@ -133,7 +199,8 @@ class RaptorR10(object):
 
     def set_params(self, k):
         """
-        Determines the parameters of the R10 encoder using k
+        Determines the parameters of the R10 encoder using k.  The
+        parameters come from the shared CodingContext for k.
 
         Arguments:
         k -- Integer number of source symbols
@@ -148,39 +215,42 @@ class RaptorR10(object):
                     MAX_K
                 )
             )
-             
-        # Let X be the smallest positive integer such that X*(X-1) >= 2*K.
-        # a = 1, b =-1 c = -2(k)
-        # quadratic = ((b * -1) + math.sqrt((b * b) - (4 * a * c))) / (2 * a)
-        c = -2 * self.k
-        self.x = ((1) + math.sqrt((1) - (4 * c))) / (2)
-        self.x = int(math.ceil(self.x))
-
-        # Let S be the smallest prime integer such that S >= ceil(0.01*K) + X
-        self.s = primes.next(math.ceil(0.01 * self.k) + self.x)
+
+        self.context = self.context_for(k)
+        self.x = self.context.x
+
+        self.s = self.context.s
         if not self.s:
             raise RaptorR10ParameterException(
                 "s: -- No s found for k: %s and x: %s" % (self.k, self.x)
             )
 
-        # Let H be the smallest integer such that choose(H,ceil(H/2)) >= K + S
-        self.h = half.next(self.k + self.s)
+        self.h = self.context.h
         if not self.h:
-            RaptorR10ParameterException(
+            raise RaptorR10ParameterException(
                 "h: Unable to find h for k: %s and s: %s" % (self.k, self.s)
             )
 
-        # Let H' be ceil(H/2)
-        self.h_prime = int(math.ceil(self.h / 2.0))
+        self.h_prime = self.context.h_prime
+        self.l = self.context.l
+        self.l_prime = self.context.l_prime
+        self.systematic_index = self.context.systematic_index
 
-        # Let L be k + s + h
-        self.l = self.k + self.s + self.h
+    @classmethod
+    def context_for(cls, k):
+        """
+        Finds or creates the CodingContext for k in context_cache
 
-        # Let L' be the smallest prime number such that L' >= L
-        self.l_prime = primes.next(self.l)
+        Arguments:
+        k -- Integer number of source symbols
 
-        # Choose a systematic index based upon k.
-        self.systematic_index = systematic_index[self.k]
+        Returns a CodingContext
+        """
+        context = cls.context_cache.get(k)
+        if context is None:
+            context = CodingContext(k)
+            cls.context_cache.put(k, context)
+        return context
 
     def __str__(self):
         """
@@ -205,36 +275,44 @@ class RaptorR10(object):
         Arguments:
         id -- Integer that ids the id'th encoded symbol
         """
-        Q = 65521
-        A = (53591 + self.systematic_index * 997) % Q
-        B = 10267 * (self.systematic_index + 1) % Q
-        Y = (B + id * A) % Q
+        Y = (self.context.triple_b + id * self.context.triple_a) % Q
         v = random.R10(Y, 0, 1048576)
         d = degree.R10(v)
         a = 1 + random.R10(Y, 1, self.l_prime - 1)
         b = random.R10(Y, 2, self.l_prime)
         return (d, a, b)
 
-    def calculate_d(self):
+    def triples(self, ids):
         """
-        Doesnt really do much except s + h 0 symbols
-        to the source block
+        triple for a whole array of ids at once
+
+        Arguments:
+        ids -- Iterable of integer encoding symbol ids
 
-        Returns a matrix prepended by s + h zero rows
-        and the symbols
+        Returns tuple of numpy arrays (d, a, b)
         """
-        d = []
-        symbolsize = len(self.symbols[0][1])
+        ids = numpy.asarray(ids, dtype='int64')
+        Y = (self.context.triple_b + ids * self.context.triple_a) % Q
+        v = random.R10_array(Y, 0, 1048576)
+        d = degree.R10_array(v)
+        a = 1 + random.R10_array(Y, 1, self.l_prime - 1)
+        b = random.R10_array(Y, 2, self.l_prime)
+        return (d, a, b)
 
-        # Creates the first s + h 0 rows of length symbolsize
-        zeros = numpy.zeros(symbolsize, dtype=DTYPE)
-        for i in xrange(self.s + self.h):
-            d.append(numpy.array(zeros, copy=True))
+    def calculate_d(self, scratch=0):
+        """
+        Doesnt really do much except s + h 0 symbols
+        to the source block
 
-        # Append the symbols that we do have
-        for id, symbol in self.symbols:
-            d.append(symbol)
-        return d
+        Keyword Arguments:
+        scratch -- Integer number of zeroed scratch rows to add at the end
+
+        Returns an arena of s + h zero rows followed by
+        copies of the symbols
+        """
+        return arena.allocate(
+            [symbol for id, symbol in self.symbols], self.s + self.h, scratch
+        )
 
     def ltenc(self, id):
         """
@@ -246,114 +324,57 @@ class RaptorR10(object):
 
         Returns a numpy array
         """
-        
-        d, a, b = self.triple(id)
-        while b >= self.l:
-            b = (b + a) % self.l_prime
+        indices = self.lt_indices(id)
+        result = numpy.array(self.i_symbols[indices[0]], copy=True)
 
-        result = numpy.array(self.i_symbols[b], copy=True)
+        def encode(columns):
+            for stripe in arena.stripes(columns, result.itemsize):
+                part = result[stripe]
+                for b in indices[1:]:
+                    self.xor_arrays(self.i_symbols[b][stripe], part)
 
-        for j in xrange(1, min(d, self.l)):
-            b = (b + a) % self.l_prime
-            while b >= self.l:
-                b = (b + a) % self.l_prime
-            self.xor_arrays(self.i_symbols[b], result)
+        parallel.run(encode, self.ranges(), self.threads)
         return result
 
-    def min_degree_row(self, a, o_degrees, m, i, u, rows_with_r):
+    def ltenc_batch(self, ids):
         """
-        Chooses a minimum degree row out of rows with r
+        ltenc for many ids at once.  Every symbol is built by XORing one
+        column of the padded lt indexes at a time across all ids.
 
         Arguments:
-        a           -- List of bitarrays representing matrix a
-        o_degrees   -- List of original row degrees
-        m           -- Integer n + s + h(a should have m rows)
-        i           -- Integer representing the i'th
-                       iteration in reducing matrix V
-        u           -- Integer representing number of columns in matrix U
-        rows_with_r -- List of row columns sharing the same number of ones
-            in matrix V
-        """
-
-        min_degree = m + 1
-        min_row = None
-        for r in rows_with_r:
-            if o_degrees[r] < min_degree:
-                min_degree = o_degrees[r]
-                min_row = r
-        return min_row
+        ids -- List of integer ids to encode
 
-    def row_from_graph(self, a, m, i, u, rows_with_r):
+        Returns a list of numpy arrays
         """
-        Builds a graph from rows where rows are edges and columns are vertices.
-        Then chooses the first edge from the largest component
+        if not len(ids):
+            return []
+        indices, degrees = self.lt_indices_batch(ids)
 
-        Arguments:
-        a           -- List of bitarrays representing matrix A
-        m           -- Integer total number of rows in A
-        i           -- Integer representing i'th iteration of reducing V
-        u           -- Integer representing number of columns in u
-        rows_with_r -- List of row indexes that share the same number of ones
-                       in V
-        """
-        graph = networkx.Graph()
-        for row in rows_with_r:
-            vertices = []
-            for vertex in xrange(i, self.l - u):
-                if a[row][vertex]:
-                    vertices.append(vertex)
-            v1, v2 = tuple(vertices)
-            graph.add_edge(v1, v2, row_index=row)
-
-        # Calculate components in graph
-        components = networkx.connected_component_subgraphs(graph)
+        # Every symbol has at least one index.  Later columns only
+        # apply to the symbols whose degree reaches them
+        result = self.i_symbols.take(indices[:, 0])
+        walking = [numpy.flatnonzero(degrees > j) for j in xrange(indices.shape[1])]
 
-        # Find the max component
-        max_component = None
-        max_size = 0
-        for c in components:
-            edges = c.edges(data=True)
-            if len(edges) > max_size:
-                max_component = edges
-                max_size = len(edges)
+        def encode(columns):
+            for stripe in arena.stripes(columns, result.itemsize):
+                part = result[:, stripe]
+                for j in xrange(1, indices.shape[1]):
+                    part[walking[j]] ^= self.i_symbols.take(indices[walking[j], j], stripe)
 
-        _, _, data = max_component[0]
-        row = data['row_index']
-        return row
+        parallel.run(encode, self.ranges(), self.threads)
+        return list(result)
 
-    def rows_with_min_r(self, a, m, i, u):
+    def take(self, how_many):
         """
-        Returns a tuple with the minimum number of 1s in a row in v
-        and the indexes of the rows containing that number of 1s
+        Produces the next how_many encoded symbols together
 
         Arguments:
-        a -- List of bitarrays representing the matrix A
-        m -- Integer total number of rows in A
-        i -- Integer indicating i'th iteration of reducing V in A
-        u -- Integer number of columns in matrix U
+        how_many -- Integer number of symbols to produce
 
-        Returns tuple (minimum r, list of rows with minimum r)
+        Returns a list of tuples (symbol id, numpy array)
         """
-        # Find minimum number of ones in a row in sub matrix v.
-        min_r = None
-        rows_with_min_r = []
-        for row_index in xrange(i, m):
-            v_row = a[row_index][i:(self.l - u)]
-
-            # let r be the number of ones in a row in v
-            r = v_row.count()
-
-            # Ignore rows 
-            if r == 0:
-                continue
-
-            if min_r is None or r < min_r :
-                min_r = r
-                rows_with_min_r = [row_index]
-            elif r == min_r:
-                rows_with_min_r.append(row_index)
-
-        return min_r, rows_with_min_r
+        ids = [self._get_next_id() for i in xrange(how_many)]
+        return zip(ids, self.ltenc_batch(ids))
 
     def calculate_i_symbols(self):
         """
@@ -365,23 +386,234 @@ class RaptorR10(object):
         """
 
         if len(self.symbols) < self.k:
-            raise RaptorR10DecodingScheduleExceptionException(
+            raise RaptorR10DecodingScheduleException(
                 "Need at least %s symbols decode but only have %s." %
                 (self.k, len(self.symbols))
             )
 
-        a = self.a()
-        schedule = self.decoding_schedule(a)
+        schedule = self.schedule()
+
+        D = self.calculate_d(schedule.scratch)
+
+        self.xors = len(schedule)
+        self.i_symbols = self.replay(schedule, D, self.s + self.h, self.l)
+
+    def replay(self, schedule, D, zeros, l):
+        """
+        Replays a schedule onto an arena in the way that suits the size
+        of its symbols
+
+        Arguments:
+        schedule -- Schedule to replay
+        D        -- Arena of the schedule's rows, changed in place
+        zeros    -- Integer number of leading rows of D that are zero
+        l        -- Integer number of columns the schedule solves for
+
+        Returns a PermutedRows view of D holding the solved symbols in
+        column order
+        """
+        backend = self.replay_backend(D.nbytes // len(D))
+        if backend is not None:
+            operations, self.schedule_stats = schedule.optimized(zeros, l)
+            storage = backend.load(D)
+            backend.replay(storage, operations)
+            backend.dump(storage, D)
+        else:
+            self.replay_builtin(schedule, D, zeros, l)
+
+        # Intermediate symbol c[i] ended up in row d[i] of D
+        c, d = schedule.permutations()
+        rows = numpy.empty(l, dtype='intp')
+        rows[c] = d[:l]
+        return arena.PermutedRows(D, rows)
+
+    def replay_builtin(self, schedule, D, zeros, l):
+        """
+        Replays a schedule onto an arena with numpy, a level at a time for
+        small symbols and otherwise in column stripes across threads
+
+        Arguments:
+        schedule -- Schedule to replay
+        D        -- Arena of the schedule's rows, changed in place
+        zeros    -- Integer number of leading rows of D that are zero
+        l        -- Integer number of columns the schedule solves for
+        """
+        if D.nbytes <= config.level_replay_max_bytes * len(D):
+            # Small symbols are dominated by the cost of each numpy call
+            # so whole levels of operations are replayed at once
+            levels, self.schedule_stats = schedule.levels(zeros, l)
+            levels.replay(D)
+        else:
+            # Each thread replays the whole schedule on its own columns.
+            # The operations are rewritten once before the threads start.
+            run = self.replayer(schedule, zeros, l)
+            replay = lambda columns: run(D[:, columns])
+            parts = parallel.ranges(D.shape[1], D.itemsize, self.threads)
+            parallel.run(replay, parts, self.threads)
+
+    def replay_backend(self, nbytes):
+        """
+        Finds the backend to replay schedules with
+
+        Arguments:
+        nbytes -- Integer bytes per symbol
+
+        Returns a Backend or None to use the built in numpy paths
+        """
+        name = self.backend or config.backend
+        if name is None:
+            return None
+        if name == 'auto':
+            # The numpy paths are timed too and win as None
+            builtin = (
+                'builtin threads=%d compiled=%s' % (self.threads, self.use_compiled_replay),
+                lambda schedule, D, zeros, l: self.replay_builtin(schedule, D.view(DTYPE), zeros, l)
+            )
+            return backends.select(nbytes, builtin)
+        return backends.get(name)
+
+    def ranges(self):
+        """
+        Returns the column ranges of the intermediate symbols to split
+        encoding across threads
+        """
+        arena = self.i_symbols.arena
+        return parallel.ranges(arena.shape[1], arena.itemsize, self.threads)
+
+    def replay_fused(self, schedule, D, zeros=None, l=None):
+        """
+        Replays the fused operations of a schedule one at a time
+
+        Arguments:
+        schedule -- Schedule to replay
+        D        -- Arena to replay onto
+
+        Keyword Arguments:
+        zeros -- Integer number of leading zero rows of D.  Defaults to
+            s + h.
+        l     -- Integer number of columns solved for.  Defaults to l.
+        """
+        if zeros is None:
+            zeros = self.s + self.h
+        if l is None:
+            l = self.l
+
+        self.replayer(schedule, zeros, l)(D)
+
+    def replayer(self, schedule, zeros, l):
+        """
+        Rewrites a schedule for replay by replay_operations or, with
+        use_compiled_replay, by replay_compiled.  Compiled functions grow
+        with the schedule so schedules with more than
+        config.compiled_replay_max_operations live xors are never
+        compiled.
+
+        Arguments:
+        schedule -- Schedule to replay
+        zeros    -- Integer number of leading zero rows of D
+        l        -- Integer number of columns solved for
+
+        Returns a function of an arena replaying the schedule onto it
+        """
+        operations, self.schedule_stats = schedule.optimized(zeros, l)
+        if (self.use_compiled_replay and
+                self.schedule_stats['live_xors'] <= config.compiled_replay_max_operations):
+            function = schedule.compiled(zeros, l)[0]
+            return lambda D: self.replay_compiled(function, D)
+        return lambda D: self.replay_operations(operations, D)
+
+    @classmethod
+    def replay_compiled(cls, function, D):
+        """
+        Runs a replay function from Schedule.compiled over D one column
+        stripe at a time
+
+        Arguments:
+        function -- Function from Schedule.compiled
+        D        -- Arena to replay onto
+        """
+        xor = numpy.bitwise_xor
+        for stripe in arena.stripes(slice(0, D.shape[1]), D.itemsize):
+            function(D[:, stripe], xor)
+
+    @classmethod
+    def replay_operations(cls, operations, D):
+        """
+        Replays fused operations over D one column stripe at a time
+
+        Arguments:
+        operations -- List of (target, sources, copy) tuples from
+            Schedule.optimized
+        D          -- Arena to replay onto
+        """
+        xor = numpy.bitwise_xor
+
+        # Every operation runs over one column stripe of D before the next
+        for stripe in arena.stripes(slice(0, D.shape[1]), D.itemsize):
+            columns = D[:, stripe]
+            for target_row, xor_rows, copy in operations:
+                # Every source of a fused operation accumulates straight
+                # into the target row
+                target = columns[target_row]
+                if copy:
+                    target[:] = columns[xor_rows[0]]
+                    xor_rows = xor_rows[1:]
+                for xor_row in xor_rows:
+                    xor(columns[xor_row], target, target)
+
+    def esis(self):
+        """
+        Returns a tuple of the ids of the symbols held
+        """
+        return tuple([id for id, symbol in self.symbols])
 
-        D = self.calculate_d()
+    def schedule_key(self):
+        """
+        Returns a tuple of the options that change the decoding schedule
+        """
+        return (
+            self.use_prepass, self.use_precomputation, self.use_inactivation,
+            self.prepass_budget, self.pivoting
+        )
 
-        self.xors = len(schedule.xors)
-        self.i_symbols = [None for i in xrange(self.l)]
-        for xor_row, target_row in schedule.xors:
-            self.xor_arrays(D[xor_row], D[target_row])
+    def schedule(self):
+        """
+        Returns the decoding schedule for the symbols held.  The last
+        schedule built is reused as long as the symbol ids have not changed.
+        The schedule for the source symbols is kept by the CodingContext
+        and schedule_cache is checked for any other set of ids before
+        building a new one.
+        """
+        esis = self.esis()
+        if self.last_schedule is None or self.last_schedule[0] != esis:
+            if esis == tuple(xrange(self.k)):
+                schedule = self.context.lazy(
+                    ('schedule',) + self.schedule_key(), self.source_schedule
+                )
+            else:
+                key = (self.k, esis) + self.schedule_key()
+                schedule = self.schedule_cache.get(key)
+                if schedule is None:
+                    schedule = self.decoding_schedule(self.a())
+                    self.schedule_cache.put(key, schedule)
+            self.last_schedule = (esis, schedule)
+        return self.last_schedule[1]
+
+    def source_schedule(self):
+        """
+        Finds the schedule for ESIs 0..k-1.  The plan stored in
+        config.plan_directory is used when there is a valid one, otherwise
+        the schedule is built.
 
-        for i in xrange(self.l):
-            self.i_symbols[schedule.c[i]] = D[schedule.d[i]]
+        Returns a Schedule
+        """
+        if config.plan_directory:
+            key = self.schedule_key()
+            path = plans.path_for(config.plan_directory, self.k, key)
+            schedule = plans.load(path, self.k, key)
+            if schedule is not None:
+                return schedule
+        return self.decoding_schedule(self.a())
 
     def decoding_schedule(self, a):
         """
@@ -391,11 +623,18 @@ class RaptorR10(object):
 
         Returns a decoding schedule for a
         """
+        if self.use_inactivation:
+            return self.inactivation_schedule(a)
+
         m = self.s + self.h + len(self.symbols)
+        if m < self.l:
+            raise RaptorR10DecodingScheduleException(
+                "A has %s rows but needs at least %s." % (m, self.l)
+            )
         schedule = Schedule(self.l, (self.s + self.h + len(self.symbols)))
 
         # Original degrees
-        o_degrees = [row.count() for row in a]
+        o_degrees = a.counts(0, m).tolist()
 
         # Take a quick stab at trying to reduce the number of xors
         if self.use_prepass:
@@ -405,50 +644,66 @@ class RaptorR10(object):
         i = 0
         u = 0
 
+        # V starts out as all of a
+        components = ComponentTracker()
+        buckets = DegreeBuckets(a.counts(0, m).tolist(), components=components)
+        rule = pivoting.get(self.pivoting)
+        v = pivoting.PackedV(a, buckets, components, o_degrees, self.l)
+
         # Keep iterating until matrix V is gone leaving, I, U, and zero sub
         # matrices
         while (i + u) < self.l:
 
-            r, rows_with_r = self.rows_with_min_r(a, m, i, u)
-            if r == 2:
-                row = self.row_from_graph(a, m, i, u, rows_with_r)
-            else:
-                row = self.min_degree_row(a, o_degrees, m, i, u, rows_with_r)
-
-            if r == 0:
+            r = buckets.minimum()[0]
+            if not r:
                 raise RaptorR10DecodingScheduleException(
                     "No nonzero row to choose from v"
                 )
 
+            v.step(i, u)
+            row, pivot = rule.choose(v)
+
             # Exchange row with first row of v
             self.exchange_row(a, o_degrees, i, row, schedule)
+            buckets.swap(i, row)
+            buckets.remove(i)
 
             # Reorder columns -- place a 1 in first column of v,
             # place remaining ones in right side of v by reordering columns
             # locate 1s
             ones = set()
-            [ones.add(column) for column in xrange(i, self.l - u) if a[i][column]]
-
-            # Exchange column i with first one column
-            if not a[i][i]:
+            [ones.add(column) for column in a.ones(i, i, self.l - u)]
+            r = len(ones)
+
+            # Every one of those columns is about to leave v
+            for column in ones:
+                buckets.decrement(a.column(column, i + 1, m).tolist())
+
+            # Exchange column i with the pivot column or any one column
+            if pivot is not None:
+                ones.remove(pivot)
+                if pivot != i:
+                    self.exchange_column(a, i, pivot)
+                    if i in ones:
+                        ones.remove(i)
+                        ones.add(pivot)
+            elif not a.get(i, i):
                 column = ones.pop()
-                self.exchange_column(a, i, column, schedule)
+                self.exchange_column(a, i, column)
             else:
                 ones.remove(i)
 
             # Align the rest up to the right
             column = self.l - u - 1
             while column > i and len(ones) > 0:
-                if not a[i][column]:
-                    self.exchange_column(a, column, ones.pop(), schedule)
+                if not a.get(i, column):
+                    self.exchange_column(a, column, ones.pop())
                 else:
                     ones.remove(column)
                 column -= 1
 
             # XOR all rows below a[i][i] that have 1
-            for row in xrange(i + 1, m):
-                if a[row][i]:
-                    self.xor_row(a, row, i, schedule)
+            self.eliminate(a, i, i, i + 1, m, schedule)
             i += 1
             u += r - 1
 
@@ -456,62 +711,213 @@ class RaptorR10(object):
         # perform gaussian elimination on u_lower so that the first u rows are
         # a u identity matrix
         for column in xrange(self.l - u, self.l):
-            if not a[column][column]:
+            if not a.get(column, column):
                 # find a row to swap
-                for row in xrange(column + 1, m):
-                    if a[row][column]:
-                        # swap rows row and column
-                        self.exchange_row(a, o_degrees, column, row, schedule)
-                        break
+                rows = a.column(column, column + 1, m)
+                if rows.size:
+                    # swap rows row and column
+                    self.exchange_row(a, o_degrees, column, int(rows[0]), schedule)
 
-                if not a[column][column]:
+                if not a.get(column, column):
                     raise RaptorR10DecodingScheduleException(
                         "U lower is of less rank than %s." % u
                     )
 
             # Loop down through rows below column xoring row column
-            for row in xrange(column + 1, m):
-                if a[row][column]:
-                    self.xor_row(a, row, column, schedule)
+            self.eliminate(a, column, column, column + 1, m, schedule)
 
         # U upper should now be in upper triangular form. now attack the top
         for column in xrange(self.l - 1, self.l - u - 1, -1):
-            for row in xrange(i, column):
-                if a[row][column]:
-                    self.xor_row(a, row, column, schedule)
+            self.eliminate(a, column, column, i, column, schedule)
 
-        # Discard any rows left after l
-        a = a[:self.l]
-        # a should now be l x l
+        # Rows after l are discarded. a should now be l x l and
+        # U lower the identity, so XORing row column into a row of
+        # U_Upper only clears that row's bit in column
+        self.clear_u_upper(unpack(a.data[:i], a.columns)[:, a.order[self.l - u:self.l]], schedule)
 
-        # XOR to get rid of 1s in U_Upper
-        for row in xrange(i):
-            for column in xrange(self.l - u, self.l):
-                if a[row][column]:
-                    self.xor_row(a, row, column, schedule)
+        # Columns were only ever exchanged within a's permutation
+        schedule.c = array(TYPECODE, a.order)
+        return schedule
+
+    def inactivation_schedule(self, a):
+        """
+        Builds the same kind of schedule as decoding_schedule by
+        inactivation decoding, see inactivation.py.  Phase 1 runs on
+        lists of each row's columns and U lower is solved on rows of
+        packed words only u columns wide.  The prepass still runs first
+        when use_prepass is set.
 
+        Arguments:
+        a -- BitMatrix representing a without a column permutation
+
+        Returns a decoding schedule for a
+        """
+        m = len(a)
+        if m < self.l:
+            raise RaptorR10DecodingScheduleException(
+                "A has %s rows but needs at least %s." % (m, self.l)
+            )
+        schedule = Schedule(self.l, m)
+        if self.use_prepass:
+            self.prepass(a, schedule)
+        return self.solve_sparse(inactivation.sparse_rows(a), self.l, schedule)
+
+    def solve_sparse(self, rows, columns, schedule):
+        """
+        Records in schedule the operations solving a system given as the
+        columns of each row by inactivation decoding
+
+        Arguments:
+        rows     -- List with a list of integer columns per row
+        columns  -- Integer number of columns
+        schedule -- Schedule(columns, len(rows)) to record into.  Its d
+            must not have been permuted yet.
+
+        Returns schedule
+        """
+        m = len(rows)
+        peeled = inactivation.peel(rows, columns, pivoting.get(self.pivoting))
+        if peeled is None:
+            raise RaptorR10DecodingScheduleException(
+                "No nonzero row to choose from v"
+            )
+        pivots, inactive = peeled
+        i, u = len(pivots), len(inactive)
+
+        # Pivots become the first i rows and columns, U the last u columns
+        taken = set([row for row, column in pivots])
+        order = [row for row, column in pivots] + [row for row in xrange(m) if row not in taken]
+        order_columns = [column for row, column in pivots] + inactive
+        index = [0] * columns
+        for n, column in enumerate(order_columns):
+            index[column] = n
+
+        # Clear the pivot columns out of every row.  A pivot row only has
+        # earlier pivots to clear so going in order means each source is
+        # already down to its own pivot and U.  Rows of U are kept as
+        # integers, bit j for column i + j.  Nothing has moved yet so rows
+        # of a are still rows of the symbols.
+        values = [0] * m
+        for n, row in enumerate(order):
+            value = 0
+            for column in rows[row]:
+                j = index[column]
+                if j >= i:
+                    value ^= 1 << (j - i)
+                elif j != n:
+                    value ^= values[j]
+                    schedule.xor_rows(order[j], row)
+            values[n] = value
+
+        schedule.d = array(TYPECODE, order)
+        schedule.c = array(TYPECODE, order_columns)
+
+        words = inactivation.to_words(values[i:], u)
+        if not inactivation.eliminate_dense(words, u, schedule, i):
+            raise RaptorR10DecodingScheduleException(
+                "U lower is of less rank than %s." % u
+            )
+
+        self.clear_u_upper(unpack(inactivation.to_words(values[:i], u), u), schedule)
         return schedule
 
+    def clear_u_upper(self, bits, schedule):
+        """
+        XORs the rows of U lower, already the identity, into the rows of
+        U upper that have a one in their column
+
+        Arguments:
+        bits -- (i x u) numpy array of booleans holding U upper
+        schedule -- Schedule to record the operations in
+        """
+        if self.use_precomputation and self.precompute_u_upper(bits, schedule):
+            return
+
+        first = len(schedule.c) - bits.shape[1]
+        for row, column in zip(*numpy.nonzero(bits)):
+            schedule.xor(int(row), first + int(column))
+
+    def precompute_u_upper(self, bits, schedule):
+        """
+        Clears U_upper using precomputed combinations of the symbols of
+        U_lower, see precomputation.py.  U_lower must already be the
+        identity.
+
+        Arguments:
+        bits -- (i x u) numpy array of booleans holding U upper
+        schedule -- Schedule to record the operations in
+
+        Returns False without recording anything when clearing a bit at a
+        time needs no more XORs
+        """
+        u = bits.shape[1]
+        first = len(schedule.c) - u
+        width, xors = precomputation.best_width(bits)
+        if width is None:
+            return False
+
+        d = schedule.d
+        for start in xrange(0, u, width):
+            rows = precomputation.patterns(bits, start, width).tolist()
+            with_pattern = {}
+            for row, pattern in enumerate(rows):
+                if pattern:
+                    with_pattern.setdefault(pattern, []).append(d[row])
+
+            # Combinations of one symbol are XORed in straight from U_lower
+            for b in xrange(min(width, u - start)):
+                for target in with_pattern.pop(1 << b, []):
+                    schedule.xor_rows(d[first + start + b], target)
+
+            if not with_pattern:
+                continue
+            scratch = schedule.add_scratch()
+            current = 0
+            for pattern in precomputation.walk(with_pattern):
+                changed = current ^ pattern
+                current = pattern
+                for b in xrange(width):
+                    if changed & (1 << b):
+                        schedule.xor_rows(d[first + start + b], scratch)
+                for target in with_pattern[pattern]:
+                    schedule.xor_rows(scratch, target)
+        return True
+
     def a(self):
         """
         Calculates the matrix a by constructing the submatrices
         and appending them together
 
-        Returns a list of bitarrays representing a
+        Returns a BitMatrix representing a
         """
+        # The ldpc and hdpc sections
+        constraints = self.constraints()
+
+        # Create the lt section
+        indices, degrees = self.lt_indices_batch([id for id, symbol in self.symbols])
+        lt = BitMatrix.from_padded(indices, self.l)
 
-        # Init a to the empty list
-        a = []
+        data = numpy.vstack((constraints.data, lt.data))
+        return BitMatrix(len(data), self.l, data)
 
-        # Create the ldpc section
-        a.extend(self.ldpc_section())
+    def constraints(self):
+        """
+        Packs the ldpc and hdpc sections that make up the first s + h
+        rows of a.  The packed rows are built once per k and kept by the
+        CodingContext.
 
-        # Create the hdpc section
-        a.extend(self.hdpc_section())
+        Returns a BitMatrix
+        """
+        data = self.context.lazy('constraints', self.pack_constraints)
+        return BitMatrix(len(data), self.l, data.copy())
 
-        # Create the lt section
-        a.extend(self.lt_section())
-        return a
+    def pack_constraints(self):
+        """
+        Returns a read only numpy array of the packed ldpc and hdpc rows
+        """
+        data = BitMatrix.from_bitarrays(self.ldpc_section() + self.hdpc_section()).data
+        data.flags.writeable = False
+        return data
 
     def ldpc_section(self):
         m = []
@@ -559,19 +965,68 @@ class RaptorR10(object):
         # ba[n] will be k1 if and only if c[b] is used in the xoring of LTEnc
         ba = bitarray(self.l)
         ba.setall(False)
+        for b in self.lt_indices(esi):
+            ba[b] = True
+        return ba
+
+    def lt_indices(self, esi):
+        """
+        Walks the triple for esi to find the intermediate symbols
+        that LTEnc XORs together
+
+        Arguments:
+        esi -- Integer encoding symbol id
+
+        Returns a list of integer intermediate symbol indexes
+        """
         d, a, b = self.triple(esi)
 
         while b >= self.l:
             b = (b + a) % self.l_prime
 
-        ba[b] = True
+        indices = [b]
 
         for j in xrange(1, min(d, self.l)):
             b = (b + a) % self.l_prime
             while b >= self.l:
                 b = (b + a) % self.l_prime
-            ba[b] = True
-        return ba
+            indices.append(b)
+        return indices
+
+    def lt_indices_batch(self, esis):
+        """
+        lt_indices for a whole array of esis at once.  Every walk takes
+        one step at a time for all esis together.
+
+        Arguments:
+        esis -- Iterable of integer encoding symbol ids
+
+        Returns tuple (indices, degrees).  indices is an (n x max degree)
+        numpy array whose row i holds the degrees[i] intermediate symbol
+        indexes for esis[i] followed by -1s.
+        """
+        d, a, b = self.triples(esis)
+        l, l_prime = self.l, self.l_prime
+        degrees = numpy.minimum(d, l)
+        width = int(degrees.max()) if degrees.size else 0
+        indices = numpy.empty((len(degrees), width), dtype='int64')
+        indices.fill(-1)
+
+        for j in xrange(width):
+            walking = numpy.flatnonzero(degrees > j)
+            step = b[walking]
+            if j:
+                step = (step + a[walking]) % l_prime
+
+            # Skip past the indexes between l and l' - 1
+            over = numpy.flatnonzero(step >= l)
+            while over.size:
+                step[over] = (step[over] + a[walking[over]]) % l_prime
+                over = over[step[over] >= l]
+
+            b[walking] = step
+            indices[walking, j] = step
+        return indices, degrees
 
     def can_decode(self):
         """
@@ -580,15 +1035,13 @@ class RaptorR10(object):
         Returns true for success, false otherwise
         """        
         try:
-            a = self.a()
-            self.decoding_schedule(a)
+            self.schedule()
             return True
         except:
             pass
         return False
 
-    @classmethod
-    def prepass(cls, a, schedule):
+    def prepass(self, a, schedule):
 
         """
         Taking a stab at doing some preliminary xoring before
@@ -598,24 +1051,77 @@ class RaptorR10(object):
         Makes a single pass comparing rows to other rows and determining
         if the xoring of two rows results in less ones.
 
+        Row i does not change while it is compared to the rows after it
+        so every one of those rows is checked against it at once.
+
+        XORing row i into row j only leaves fewer ones when j has more
+        than (w + 2) / 2 of row i's w ones, so j misses fewer than w / 2
+        of them.  Any w / 2 or so of row i's columns must then include one
+        of j's, and only the rows found through an index of the rows
+        below i in each of those columns are compared.  The columns with
+        the fewest rows are used.
+
         Arguments:
-        a - List of bitarrays representing matrix a
+        a - BitMatrix representing matrix a
         schedule - Schedule of operations recorded on a to mimic on
             encoded symbols
+
+        Stops early once more than prepass_budget index entries have been
+        visited.  Leaves counts of the work done in prepass_stats.
         """
+        m = len(a)
+        ones = [set(row) for row in inactivation.sparse_rows(a)]
+        weights = numpy.array([len(row) for row in ones], dtype='int64')
+        below = [set() for column in xrange(a.columns)]
+        for row in xrange(m):
+            for column in ones[row]:
+                below[column].add(row)
+
+        stats = self.prepass_stats = {
+            'xors': 0, 'ones_removed': 0, 'work': 0, 'exhausted': False
+        }
 
         # Iterate over rows in a
-        for i in xrange(len(a)):
+        for i in xrange(m - 1):
+            row_ones = ones[i]
+            for column in row_ones:
+                below[column].discard(i)
+
+            # Rows j share at least this many columns with row i
+            w = len(row_ones)
+            shared = w // 2 + 2
+            if shared > w:
+                continue
+            prefix = sorted(row_ones, key=lambda column: len(below[column]))[:w - shared + 1]
+            candidates = set()
+            for column in prefix:
+                candidates.update(below[column])
+                stats['work'] += len(below[column])
+
+            if self.prepass_budget is not None and stats['work'] > self.prepass_budget:
+                stats['exhausted'] = True
+                break
+            if not candidates:
+                continue
 
-            # Iterate over remaining rows in a
-            for j in xrange(i + 1, len(a)):
-                count = a[j].count()
-                new_row = a[i] ^ a[j]
+            # Check requirements prior to proceeding with XOR
+            rows = numpy.array(sorted(candidates), dtype='intp')
+            new_counts = popcount(a.data[rows] ^ a.data[i])
+            better = new_counts + 2 < weights[rows]
+            for j, count in zip(rows[better].tolist(), new_counts[better].tolist()):
+                self.xor_row(a, j, i, schedule)
+                stats['xors'] += 1
+                stats['ones_removed'] += int(weights[j]) - count
+                weights[j] = count
+
+                for column in row_ones:
+                    if column in ones[j]:
+                        ones[j].remove(column)
+                        below[column].discard(j)
+                    else:
+                        ones[j].add(column)
+                        below[column].add(j)
 
-                # Check requirements prior to proceeding with XOR
-                if new_row.count() + 2 < count:
-                    cls.xor_row(a, j, i, schedule)
- 
     @classmethod
     def xor_row(cls, a, r1, r2, schedule):
 
@@ -624,37 +1130,49 @@ class RaptorR10(object):
         within the schedule
 
         Arguments:
-        a -- List of l sized bitarrays
+        a -- BitMatrix of l columns
         r1 -- Integer target row id
         r2 -- Integer source row id
         schedule -- Schedule to record the operation in
         """
         # XOR r2 of a into r1 of a
-        a[r1] ^= a[r2]
+        a.xor_row(r1, r2)
 
         # Schedule the xor
         schedule.xor(r1, r2)
 
     @classmethod
-    def exchange_column(cls, a, c1, c2, schedule):
+    def eliminate(cls, a, pivot, column, start, stop, schedule):
+
         """
-        Exchanges column c1 of a with column c2 of a and records the operation
-        in the schedule
+        XORS row pivot into every row from start up to stop with a one
+        in column and records the operations within the schedule
 
         Arguments:
-        a -- List of bit arrays representing a
+        a -- BitMatrix of l columns
+        pivot -- Integer source row id
+        column -- Integer column to clear
+        start -- Integer first row to consider
+        stop -- Integer row after the last row to consider
+        schedule -- Schedule to record the operations in
+        """
+        for row in a.eliminate(pivot, column, start, stop):
+            schedule.xor(int(row), pivot)
+
+    @classmethod
+    def exchange_column(cls, a, c1, c2):
+        """
+        Exchanges column c1 of a with column c2 of a.  a only swaps two
+        entries of its column permutation which later becomes the
+        schedule's c
+
+        Arguments:
+        a -- BitMatrix representing a
         c1 -- Integer first column id
         c2 -- Integer second column id
-        schedule -- Schedule of operations performed upon a        
         """
         # Exchange the columns c1 and c2 in a
-        for i in xrange(len(a)):
-            temp = a[i][c1]
-            a[i][c1] = a[i][c2]
-            a[i][c2] = temp
-
-        # Record the operation
-        schedule.exchange_column(c1, c2)
+        a.swap_columns(c1, c2)
 
     @classmethod
     def exchange_row(cls, a, o_degrees, r1, r2, schedule):
@@ -663,16 +1181,14 @@ class RaptorR10(object):
         in the schedule
 
         Arguments:
-        a -- list of bitarrays representing a
+        a -- BitMatrix representing a
         o_degrees -- List of original degrees of rows
         r1 -- Integer id of first row to exchange
         r2 -- Integer id of second row to exchange
         schedule -- Schedule to record the operation in
         """
         # Exchange r1 with r2 of a
-        temp = a[r1]
-        a[r1] = a[r2]
-        a[r2] = temp
+        a.swap_rows(r1, r2)
 
         temp = o_degrees[r1]
         o_degrees[r1] = o_degrees[r2]
@@ -730,12 +1246,13 @@ class RaptorR10(object):
                 return True
             return False
 
+        sequence = gray.with_ones(H_HALF, k + S)
         matrix = []
         for h in xrange(H):
             ba = bitarray(k + S)
             ba.setall(False)
             for j in xrange(k + S):
-                if check_nth_bit(h, gray.SEQUENCE[H_HALF][j]):
+                if check_nth_bit(h, sequence[j]):
                     ba[j] = True
             matrix.append(ba)
         return matrix
@@ -763,18 +1280,21 @@ class RaptorR10(object):
         Arguments:
         how_many -- Integer number of optimal symbols to produce
         """
-        a = []
-        a.extend(self.ldpc_section())
-        a.extend(self.hdpc_section())
+        # Rows of a seen so far as strings of their packed words
+        a = set([row.tostring() for row in self.constraints().data])
+
+        # Every row the search cycles through is built up front
+        indices, degrees = self.lt_indices_batch(xrange(5000))
+        rows = BitMatrix.from_padded(indices, self.l).data
 
         yielded = 0
         xors = 1
         i = 0
         while yielded < how_many:
-            ba = self.lt_row(i)
-            if ba.count() == xors and not(ba in a):
+            row = rows[i].tostring()
+            if degrees[i] == xors and not(row in a):
                 yielded += 1
-                a.append(ba)
+                a.add(row)
                 yield i
             i += 1
             if i == 5000:
@@ -13,12 +13,42 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import itertools
+import linecache
+import struct
+import threading
+from array import array
+from itertools import izip
+
+import numpy
+
+# Every row, column and xor is stored as a native unsigned 32 bit integer
+TYPECODE = 'I'
+DTYPE = 'uint32'
+
+# l, m, the number of scratch rows and the number of xors at the start of
+# a serialized schedule
+COUNTS = struct.Struct('=IIII')
+
 class Schedule(object):
     """
     Class is used to keep track of operations on a matrix that can
     be mirrored onto another matrix
+
+    c and d are array('I') permutations.  The xors are kept flat in the
+    array('I') pairs as source, target, source, target...  A schedule
+    read back with fromstring holds numpy views of the string instead and
+    can no longer be added to.
+
+    Rows len(d) through len(d) + scratch - 1 are scratch rows holding
+    temporary combinations of other rows.  They start out zero.
+
+    Cached schedules are shared between coders and threads so the
+    rewrites kept in rewritten are built under lock, once each.
     """
 
+    __slots__ = ('c', 'd', 'pairs', 'scratch', 'rewritten', 'lock')
+
     def __init__(self, l, m):
         """
         Initializes the sequences c and d
@@ -28,25 +58,126 @@ class Schedule(object):
         m -- Integer combined h + s + n(number of encoding symbols.  n should be >= k)
         """
         # Let c[0] = 0, c[1] = 1,...,c[L-1] = L-1
-        self.c = range(l)
+        self.c = array(TYPECODE, xrange(l))
 
         # Let d[0] = 0, d[1] = 1,...,d[M-1] = M-1
-        self.d = range(m)
+        self.d = array(TYPECODE, xrange(m))
+
+        # Init xors to empty
+        self.pairs = array(TYPECODE)
+
+        self.scratch = 0
+
+        # Rewritten xors from optimized keyed by its arguments
+        self.rewritten = {}
+        self.lock = threading.RLock()
+
+    def _get_xors(self):
+        """
+        Returns a list of (source, target) tuples
+        """
+        pairs = list(self.pairs)
+        return zip(pairs[0::2], pairs[1::2])
+
+    def _set_xors(self, xors):
+        """
+        Replaces the xors with an iterable of (source, target) pairs
+        """
+        with self.lock:
+            self.pairs = array(TYPECODE, [row for pair in xors for row in pair])
+            self.rewritten = {}
 
-        # Init xors to empty list
-        self.xors = []
+    xors = property(_get_xors, _set_xors)
+
+    def __len__(self):
+        """
+        Returns the number of xors
+        """
+        return len(self.pairs) // 2
 
     def xor(self, r1, r2):
         """
-        Indicates r2 is xored into r1.  Appends a tuple(d[r2], d[r1])
-        to the list of xors
+        Indicates r2 is xored into r1.  Appends d[r2], d[r1] to the xors
         Ordering of r1, r2 DOES matter
 
         Arguments:
         r1 -- Integer indicating target row
         r2 -- Integer indicating source row
         """
-        self.xors.append((self.d[r2], self.d[r1]))
+        self.pairs.append(self.d[r2])
+        self.pairs.append(self.d[r1])
+
+    def xor_rows(self, source, target):
+        """
+        Appends an xor of row source into row target.  Unlike xor the
+        rows are rows of the symbols, not of a, so scratch rows can be
+        used.
+
+        Arguments:
+        source -- Integer row read
+        target -- Integer row written
+        """
+        self.pairs.append(source)
+        self.pairs.append(target)
+
+    def add_scratch(self):
+        """
+        Returns the row of a new zeroed scratch row
+        """
+        self.scratch += 1
+        return len(self.d) + self.scratch - 1
+
+    def rows(self):
+        """
+        Returns the number of rows the symbols need including scratch rows
+        """
+        return len(self.d) + self.scratch
+
+    def permutations(self):
+        """
+        Returns tuple (c, d) as numpy arrays sharing memory with the
+        schedule
+        """
+        return as_numpy(self.c), as_numpy(self.d)
+
+    def tostring(self):
+        """
+        Serializes the schedule as native uint32s: l, m, the number of
+        scratch rows, the number of xors, c, d and then the xor pairs
+
+        Returns a string
+        """
+        return "".join([
+            COUNTS.pack(len(self.c), len(self.d), self.scratch, len(self)),
+            as_numpy(self.c).tostring(),
+            as_numpy(self.d).tostring(),
+            as_numpy(self.pairs).tostring(),
+        ])
+
+    @classmethod
+    def fromstring(cls, data, offset=0):
+        """
+        Reads back a schedule written by tostring without copying.  The
+        schedule keeps numpy views of data so data must not change.
+
+        Arguments:
+        data -- String or buffer holding the schedule
+
+        Keyword Arguments:
+        offset -- Integer byte offset of the schedule within data
+
+        Returns a Schedule
+        """
+        l, m, scratch, xors = COUNTS.unpack_from(data, offset)
+        words = numpy.frombuffer(
+            data, dtype=DTYPE, count=l + m + 2 * xors, offset=offset + COUNTS.size
+        )
+        schedule = cls(0, 0)
+        schedule.c = words[:l]
+        schedule.d = words[l:l + m]
+        schedule.pairs = words[l + m:]
+        schedule.scratch = scratch
+        return schedule
 
     def exchange_row(self, r1, r2):
         """
@@ -73,3 +204,300 @@ class Schedule(object):
         swap = self.c[c1]
         self.c[c1] = self.c[c2]
         self.c[c2] = swap
+
+    def rewrite(self, key, build):
+        """
+        Returns the rewrite kept under key, calling build to make it the
+        first time.  Threads asking for the same rewrite wait for the
+        first one to build it.
+
+        Arguments:
+        key   -- Tuple naming the rewrite
+        build -- Function of no arguments returning the rewrite
+        """
+        with self.lock:
+            if key not in self.rewritten:
+                self.rewritten[key] = build()
+            return self.rewritten[key]
+
+    def without_zeros(self, zeros):
+        """
+        Rewrites the xors for a d whose first zeros rows start out all
+        zero, as do the scratch rows.  A row stays known to be zero until
+        something nonzero is xored into it.  XORs out of a zero row do
+        nothing and are dropped and XORs into a zero row become copies.
+
+        Arguments:
+        zeros -- Integer number of leading zero rows of d
+
+        Returns tuple (list of (source, target, copy) tuples, number of
+        xors dropped, number of xors turned into copies)
+        """
+        m = len(self.d)
+        zero = [row < zeros or row >= m for row in xrange(self.rows())]
+        operations = []
+        dropped = 0
+        copies = 0
+        pairs = as_numpy(self.pairs).tolist()
+        for source, target in izip(pairs[0::2], pairs[1::2]):
+            if zero[source]:
+                dropped += 1
+            elif zero[target]:
+                zero[target] = False
+                copies += 1
+                operations.append((source, target, True))
+            else:
+                operations.append((source, target, False))
+
+        return (operations, dropped, copies)
+
+    def optimized(self, zeros, l):
+        """
+        Optimizes the xors for replay onto a d whose first zeros rows
+        start out all zero.  After live_operations, runs of operations
+        into the same target are fused into a single operation with many
+        sources, which replays as one reduction of the sources into the
+        target row.
+
+        The result is kept so the optimizing happens once per schedule.
+
+        Arguments:
+        zeros -- Integer number of leading zero rows of d
+        l     -- Integer number of intermediate symbols
+
+        Returns tuple (list of (target, sources, copy) tuples, dictionary
+        of counts).  copy is True when the target should be overwritten
+        rather than xored into.
+        """
+        return self.rewrite(('fused', zeros, l), lambda: self.fuse(zeros, l))
+
+    def fuse(self, zeros, l):
+        """
+        Builds the result of optimized
+        """
+        needed, counts = self.live_operations(zeros, l)
+
+        fused = []
+        for source, target, copy in needed:
+            if fused and fused[-1][0] == target:
+                fused[-1][1].append(source)
+            else:
+                fused.append((target, [source], copy))
+
+        counts['operations'] = len(fused)
+        counts['live_xors'] = len(needed)
+        return (fused, counts)
+
+    def compiled(self, zeros, l):
+        """
+        Compiles the fused operations from optimized into a Python
+        function of straight line numpy calls.  Every row of d is looked
+        up once at the top of the function so the body is only calls on
+        local variables.
+
+        The function is called as function(d, xor) where xor is
+        numpy.bitwise_xor.  Its source is kept as function.source and is
+        also registered with linecache so tracebacks and profilers can
+        show it.  The function is kept so compiling happens once per
+        schedule.
+
+        Arguments:
+        zeros -- Integer number of leading zero rows of d
+        l     -- Integer number of intermediate symbols
+
+        Returns tuple (function, dictionary of counts)
+        """
+        def build():
+            operations, counts = self.optimized(zeros, l)
+            return (compile_replay(operations), counts)
+
+        return self.rewrite(('compiled', zeros, l), build)
+
+    def live_operations(self, zeros, l):
+        """
+        Runs without_zeros and then follows liveness backwards from the
+        rows d[:l] that hold the intermediate symbols at the end.  An
+        operation whose target is not read again before the end is dropped.
+
+        Arguments:
+        zeros -- Integer number of leading zero rows of d
+        l     -- Integer number of intermediate symbols
+
+        Returns tuple (list of (source, target, copy) tuples, dictionary
+        of counts)
+        """
+        operations, dropped, copies = self.without_zeros(zeros)
+
+        # A copy does not read its target so the target is dead before it
+        live = set(as_numpy(self.d)[:l].tolist())
+        needed = []
+        for source, target, copy in reversed(operations):
+            if target in live:
+                if copy:
+                    live.discard(target)
+                live.add(source)
+                needed.append((source, target, copy))
+        needed.reverse()
+
+        counts = {
+            'xors': len(self),
+            'dropped_xors': dropped,
+            'copied_xors': copies,
+            'dead_xors': len(operations) - len(needed),
+        }
+        return needed, counts
+
+    def levels(self, zeros, l):
+        """
+        Splits the live operations into levels that can each be replayed
+        with a single gather and scatter over the rows of d.
+
+        Within a level no row is written twice and no row is read after
+        it is written, so every operation of a level can read its source
+        before any of them write.  An operation goes in the first level
+        after the last write to its source or target and no earlier than
+        the last read of its target.
+
+        The result is kept so the levels are only found once per schedule.
+
+        Arguments:
+        zeros -- Integer number of leading zero rows of d
+        l     -- Integer number of intermediate symbols
+
+        Returns tuple (Levels, dictionary of counts)
+        """
+        return self.rewrite(('levels', zeros, l), lambda: self.find_levels(zeros, l))
+
+    def find_levels(self, zeros, l):
+        """
+        Builds the result of levels
+        """
+        needed, counts = self.live_operations(zeros, l)
+
+        rows = self.rows()
+        written = [-1] * rows
+        read = [0] * rows
+        assigned = []
+        for source, target, copy in needed:
+            level = max(written[source] + 1, written[target] + 1, read[target])
+            written[target] = level
+            if read[source] < level:
+                read[source] = level
+            assigned.append(level)
+
+        levels = Levels(needed, assigned)
+        counts['levels'] = len(levels)
+        return (levels, counts)
+
+class Levels(object):
+
+    """
+    Operations grouped into levels by Schedule.levels.  The operations
+    are sorted by level and within a level copies come before xors.
+    Level i is operations bounds[i] to bounds[i + 1] and its xors start
+    at splits[i].
+    """
+
+    __slots__ = ('sources', 'targets', 'bounds', 'splits')
+
+    def __init__(self, operations, assigned):
+        """
+        Arguments:
+        operations -- List of (source, target, copy) tuples
+        assigned   -- List of the integer level of each operation
+        """
+        count = len(operations)
+        sources = numpy.empty(count, dtype='intp')
+        targets = numpy.empty(count, dtype='intp')
+        xors = numpy.empty(count, dtype='intp')
+        for i, (source, target, copy) in enumerate(operations):
+            sources[i] = source
+            targets[i] = target
+            xors[i] = not copy
+
+        levels = numpy.asarray(assigned, dtype='intp')
+        order = numpy.argsort(levels * 2 + xors, kind='mergesort')
+        self.sources = sources[order]
+        self.targets = targets[order]
+
+        levels = levels[order]
+        xors = xors[order]
+        total = int(levels[-1]) + 1 if count else 0
+        self.bounds = numpy.searchsorted(levels, numpy.arange(total + 1))
+        self.splits = numpy.searchsorted(levels * 2 + xors, numpy.arange(total) * 2 + 1)
+
+    def __len__(self):
+        """
+        Returns the number of levels
+        """
+        return len(self.bounds) - 1
+
+    def replay(self, d):
+        """
+        Applies the operations to the rows of a 2D array
+
+        Arguments:
+        d -- 2D numpy array of symbols
+        """
+        sources, targets = self.sources, self.targets
+        splits = self.splits.tolist()
+        bounds = self.bounds.tolist()
+        for i in xrange(len(splits)):
+            start, split, stop = bounds[i], splits[i], bounds[i + 1]
+
+            # Read every source before anything in the level is written
+            values = d[sources[start:stop]]
+            if split > start:
+                d[targets[start:split]] = values[:split - start]
+            if stop > split:
+                d[targets[split:stop]] ^= values[split - start:]
+
+# Numbers the files generated replay functions claim to come from
+_compiled = itertools.count()
+
+def compile_replay(operations):
+    """
+    Generates and compiles a replay function for fused operations
+
+    Arguments:
+    operations -- List of (target, sources, copy) tuples from
+        Schedule.optimized
+
+    Returns a function of (d, xor) with its source as function.source
+    """
+    rows = sorted(set(
+        [target for target, sources, copy in operations] +
+        [source for target, sources, copy in operations for source in sources]
+    ))
+
+    lines = ["def replay(d, xor):"]
+    for row in rows:
+        lines.append("    r%d = d[%d]" % (row, row))
+    for target, sources, copy in operations:
+        if copy:
+            lines.append("    r%d[:] = r%d" % (target, sources[0]))
+            sources = sources[1:]
+        for source in sources:
+            lines.append("    xor(r%d, r%d, r%d)" % (source, target, target))
+    lines.append("    return d")
+    source = "\n".join(lines) + "\n"
+
+    filename = "<schedule replay %d>" % next(_compiled)
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+    namespace = {}
+    exec compile(source, filename, 'exec') in namespace
+    function = namespace['replay']
+    function.source = source
+    return function
+
+def as_numpy(buf):
+    """
+    Views an array('I') or numpy array of rows as a numpy array
+    without copying
+    """
+    if isinstance(buf, array):
+        if not len(buf):
+            return numpy.zeros(0, dtype=DTYPE)
+        return numpy.frombuffer(buf, dtype=DTYPE)
+    return numpy.asarray(buf, dtype=DTYPE)
@@ -1,6 +1,7 @@
 import config
 import hashlib
 import numpy
+from decoder import Decoder
 from metadata import Metadata
 from raptor import RaptorR10
 
@@ -80,7 +81,7 @@ class StringEncoder(RaptorR10):
         meta = Metadata(esi, self.k, self.padding, digest)
         return "%s%s" % (str(meta), symbol)
 
-class StringDecoder(RaptorR10):
+class StringDecoder(Decoder):
     """
     Strings are appended to an instance of this class until decoding
     becomes possible at which point the intermediate symbols can
@@ -120,9 +121,9 @@ class StringDecoder(RaptorR10):
         if not self.can_decode():
             raise Exception("Unable to decode with the symbols provided.")
 
-        # Calculate i symbols
-        self.calculate_i_symbols()
-    
+        # The intermediate symbols are only calculated once something
+        # needs them, which decode does not when every source symbol is held
+
     def next(self):
         """
         Converts parent's tuple (esi, numpy array) to 
@@ -130,6 +131,8 @@ class StringDecoder(RaptorR10):
 
         Returns string
         """
+        if self.i_symbols is None:
+            Decoder.decode(self)
         esi, symbol = super(StringDecoder, self).next()
         return symbol.tostring()
 
@@ -140,12 +143,8 @@ class StringDecoder(RaptorR10):
 
         Return the original string
         """
-        # Check the i symbols
-        if not self.i_symbols:
-            return None
-
-        # Assemble the first k source symbols into one string
-        string = "".join([self.next() for i in xrange(self.k)])
+        # Assemble the k source symbols into one string
+        string = "".join([symbol.tostring() for symbol in self.recover_source()])
 
         # Strip any padding if necessary
         if self.padding:
@@ -0,0 +1,50 @@
+import numpy
+
+def random_source(k, words, seed=0):
+    """
+    Makes k source symbols of random words.  Every word of every symbol is
+    random so a result that is wrong in only a few words, or that is some
+    other linear combination of the symbols, does not compare equal.
+
+    Arguments:
+    k     -- Integer number of source symbols
+    words -- Integer number of uint64 words in each symbol
+
+    Keyword Arguments:
+    seed -- Integer seed of the numpy RandomState
+
+    Returns a list of (esi, numpy array) tuples
+    """
+    random = numpy.random.RandomState(seed)
+    data = random.randint(0, 2 ** 64, size=(k, words), dtype='uint64')
+    return [(i, data[i].copy()) for i in xrange(k)]
+
+def decode(decoder, symbols):
+    """
+    Appends symbols to decoder and decodes them
+
+    Arguments:
+    decoder -- Decoder
+    symbols -- Iterable of (esi, numpy array) tuples
+
+    Returns decoder
+    """
+    for symbol in symbols:
+        decoder.append(symbol)
+    decoder.decode()
+    return decoder
+
+def assert_decoded(test, decoder, source, msg=None):
+    """
+    Checks that the next symbols decoder encodes are the source symbols
+
+    Arguments:
+    test    -- unittest.TestCase making the assertions
+    decoder -- Decoder that has decoded
+    source  -- List of (esi, numpy array) source symbols in esi order
+
+    Keyword Arguments:
+    msg -- Optional message for a failure
+    """
+    for esi, symbol in source:
+        test.assertTrue((decoder.next()[1] == symbol).all(), msg)
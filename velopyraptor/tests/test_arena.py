@@ -0,0 +1,89 @@
+import os
+import sys
+import unittest
+
+import numpy
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arena
+import config
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import decode, random_source
+
+class TestArena(unittest.TestCase):
+
+    def test_allocate(self):
+        """
+        Tests that symbols are copied in after the zero rows
+        """
+        symbols = [numpy.arange(3, dtype='uint64') + i for i in xrange(2)]
+        a = arena.allocate(symbols, 2)
+        self.assertEqual(a.tolist(), [[0, 0, 0], [0, 0, 0], [0, 1, 2], [1, 2, 3]])
+        a[2] ^= 1
+        self.assertEqual(symbols[0].tolist(), [0, 1, 2])
+
+    def test_permuted_rows(self):
+        """
+        Tests that the view reads through to the arena rows in order
+        """
+        a = numpy.arange(8, dtype='uint64').reshape(4, 2)
+        view = arena.PermutedRows(a, [3, 1])
+        self.assertEqual(len(view), 2)
+        self.assertEqual(view[0].tolist(), [6, 7])
+        self.assertEqual([row.tolist() for row in view], [[6, 7], [2, 3]])
+        self.assertEqual(view.take(numpy.array([1, 1, 0])).tolist(), [[2, 3], [2, 3], [6, 7]])
+        a[1] = 0
+        self.assertEqual(view[1].tolist(), [0, 0])
+
+    def test_stripes(self):
+        """
+        Tests splitting symbols into column stripes
+        """
+        config.stripe_bytes = 64
+        try:
+            self.assertEqual(arena.stripes(slice(0, 10), 8), [slice(0, 10)])
+            self.assertEqual(
+                arena.stripes(slice(2, 20), 8),
+                [slice(2, 10), slice(10, 18), slice(18, 20)]
+            )
+        finally:
+            config.stripe_bytes = None
+
+    def test_striped_coding(self):
+        """
+        Tests that striped encoding and decoding match whole symbol
+        encoding and decoding
+        """
+        k = 20
+        def code():
+            encoder = Encoder(k, random_source(k, 40))
+            decoder = decode(Decoder(k), encoder.take(k * 2)[k / 2:])
+            ids = range(k * 3)
+            return [s.tolist() for s in [encoder.ltenc(i) for i in ids] + decoder.ltenc_batch(ids)]
+
+        level_replay_max_bytes = config.level_replay_max_bytes
+        config.level_replay_max_bytes = 0
+        try:
+            whole = code()
+            config.stripe_bytes = 64
+            self.assertEqual(code(), whole)
+        finally:
+            config.stripe_bytes = None
+            config.level_replay_max_bytes = level_replay_max_bytes
+
+    def test_symbols_untouched(self):
+        """
+        Tests that encoding does not write to the source symbols
+        """
+        k = 20
+        symbols = random_source(k, 4)
+        copies = [symbol.copy() for i, symbol in symbols]
+        Encoder(k, symbols)
+        for (i, symbol), copy in zip(symbols, copies):
+            self.assertTrue((symbol == copy).all())
+
+if __name__ == '__main__':
+    unittest.main()
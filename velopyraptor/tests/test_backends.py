@@ -0,0 +1,88 @@
+import os
+import sys
+import unittest
+
+import numpy
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backends
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import assert_decoded, decode, random_source
+
+OPERATIONS = [(2, [0, 1], True), (3, [2], False), (0, [3, 1], False)]
+
+class TestBackends(unittest.TestCase):
+
+    def test_replay(self):
+        """
+        Tests that every backend replays operations to the same symbols
+        """
+        arena = numpy.arange(4 * 24, dtype='uint8').reshape(4, 24)
+        expected = arena.copy()
+        expected[2] = expected[0] ^ expected[1]
+        expected[3] ^= expected[2]
+        expected[0] ^= expected[3] ^ expected[1]
+
+        for name, backend in backends.BACKENDS.items():
+            symbols = arena.copy()
+            storage = backend.load(symbols)
+            backend.replay(storage, OPERATIONS)
+            self.assertFalse(backend.is_zero(storage, 0))
+            backend.xor(storage, 1, 2)
+            backend.copy(storage, 0, 3)
+            backend.dump(storage, symbols)
+            self.assertTrue((symbols[2:] == expected[2:]).all(), name)
+            self.assertTrue((symbols[1] == expected[1] ^ expected[2]).all(), name)
+            self.assertTrue((symbols[0] == expected[3]).all(), name)
+
+    def test_allocate(self):
+        """
+        Tests that allocated symbols start zeroed and dump like loaded ones
+        """
+        arena = numpy.arange(3 * 24, dtype='uint8').reshape(3, 24)
+        for name, backend in backends.BACKENDS.items():
+            storage = backend.allocate(3, 24)
+            for row in xrange(3):
+                self.assertTrue(backend.is_zero(storage, row), name)
+
+            loaded = backend.load(arena.copy())
+            backend.xor(storage, 1, 1)
+            self.assertTrue(backend.is_zero(storage, 1), name)
+            symbols = numpy.zeros_like(arena)
+            backend.dump(storage, symbols)
+            self.assertFalse(symbols.any(), name)
+
+            backend.xor(loaded, 2, 2)
+            self.assertTrue(backend.is_zero(loaded, 2), name)
+            self.assertFalse(backend.is_zero(loaded, 1), name)
+
+    def test_select(self):
+        """
+        Tests that the chosen backend is remembered per symbol size
+        """
+        backend = backends.select(24)
+        self.assertTrue(backend.name in backends.BACKENDS)
+        self.assertEqual(backends._selected[(24, None)], backend.name)
+        self.assertNotEqual(backends.select(12).name, 'numpy-uint64')
+
+        # A built in replay that does nothing is always fastest
+        builtin = ('nothing', lambda schedule, arena, zeros, l: None)
+        self.assertEqual(backends.select(24, builtin), None)
+        self.assertEqual(backends._selected[(24, 'nothing')], None)
+
+    def test_decode(self):
+        """
+        Tests decoding through every backend
+        """
+        k = 20
+        source = random_source(k, 8)
+        symbols = Encoder(k, source).take(k * 2)[k / 2:]
+        for name in backends.BACKENDS.keys() + ['auto']:
+            decoder = decode(Decoder(k, backend=name), symbols)
+            assert_decoded(self, decoder, source, name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import unittest
+
+from bitarray import bitarray
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitmatrix import BitMatrix
+
+ROWS = [
+    bitarray('1' + '0' * 68 + '1' + '0' * 30),
+    bitarray('0' * 69 + '1' + '0' * 29 + '1'),
+    bitarray('1' * 100),
+    bitarray('0' * 100),
+]
+
+class TestBitMatrix(unittest.TestCase):
+
+    def test_round_trip(self):
+        """
+        Tests that packing and unpacking bitarrays is lossless
+        """
+        m = BitMatrix.from_bitarrays(ROWS)
+        self.assertEqual(len(m), len(ROWS))
+        self.assertEqual(m.columns, 100)
+        self.assertEqual(m.width, 2)
+        self.assertEqual(m.to_bitarrays(), ROWS)
+
+    def test_get_and_set(self):
+        """
+        Tests reading and writing single bits across word boundaries
+        """
+        m = BitMatrix.from_bitarrays(ROWS)
+        self.assertTrue(m.get(0, 0))
+        self.assertTrue(m.get(0, 69))
+        self.assertFalse(m.get(0, 68))
+        m.set(3, 64)
+        self.assertTrue(m.get(3, 64))
+        m.set(3, 64, False)
+        self.assertFalse(m.get(3, 64))
+
+    def test_counts(self):
+        """
+        Tests counting ones in whole rows and within a column range
+        """
+        m = BitMatrix.from_bitarrays(ROWS)
+        self.assertEqual(m.counts(0, 4).tolist(), [2, 2, 100, 0])
+        self.assertEqual(m.counts(0, 4, m.mask(60, 70)).tolist(), [1, 1, 10, 0])
+        self.assertEqual(m.count(1, m.mask(70, 100)), 1)
+
+    def test_ones_and_column(self):
+        """
+        Tests listing the ones of a row and the rows of a column
+        """
+        m = BitMatrix.from_bitarrays(ROWS)
+        self.assertEqual(m.ones(1), [69, 99])
+        self.assertEqual(m.ones(2, 97), [97, 98, 99])
+        self.assertEqual(m.column(69).tolist(), [0, 1, 2])
+        self.assertEqual(m.column(69, 1, 2).tolist(), [1])
+
+    def test_eliminate(self):
+        """
+        Tests XORing a pivot into every row with a one in a column
+        """
+        m = BitMatrix.from_bitarrays(ROWS)
+        rows = m.eliminate(0, 69)
+        self.assertEqual(rows.tolist(), [1, 2])
+        self.assertEqual(m.column(69).tolist(), [0])
+        self.assertEqual(m.to_bitarrays()[1], ROWS[0] ^ ROWS[1])
+        self.assertEqual(m.to_bitarrays()[2], ROWS[0] ^ ROWS[2])
+
+    def test_swaps(self):
+        """
+        Tests exchanging rows and columns
+        """
+        m = BitMatrix.from_bitarrays(ROWS)
+        m.swap_rows(0, 3)
+        self.assertEqual(m.to_bitarrays()[0], ROWS[3])
+        self.assertEqual(m.to_bitarrays()[3], ROWS[0])
+
+        m.swap_columns(0, 99)
+        self.assertEqual(m.ones(3), [69, 99])
+        self.assertEqual(m.ones(1), [0, 69])
+        self.assertEqual(m.count(2), 100)
+
+    def test_column_permutation(self):
+        """
+        Tests that exchanging columns only remaps them on reads
+        """
+        m = BitMatrix.from_bitarrays(ROWS)
+        data = m.data.copy()
+        m.swap_columns(1, 69)
+        self.assertTrue((m.data == data).all())
+        self.assertEqual(m.order[1], 69)
+        self.assertTrue(m.get(0, 1))
+        self.assertFalse(m.get(0, 69))
+        self.assertEqual(m.column(1).tolist(), [0, 1, 2])
+        self.assertEqual(m.counts(0, 2, m.mask(0, 2)).tolist(), [2, 1])
+        self.assertEqual(m.to_bitarrays()[1][:2], bitarray('01'))
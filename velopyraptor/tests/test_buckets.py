@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buckets import DegreeBuckets
+
+class TestDegreeBuckets(unittest.TestCase):
+
+    def test_minimum(self):
+        """
+        Tests that the lightest nonzero rows are found
+        """
+        b = DegreeBuckets([3, 0, 2, 5, 2])
+        self.assertEqual(b.minimum(), (2, set([2, 4])))
+
+    def test_start(self):
+        """
+        Tests that rows before start are ignored
+        """
+        b = DegreeBuckets([1, 3, 4], start=1)
+        self.assertEqual(b.minimum(), (3, set([1])))
+
+    def test_empty(self):
+        """
+        Tests that no minimum is found when every row is zero
+        """
+        b = DegreeBuckets([0, 0])
+        self.assertEqual(b.minimum(), (None, set()))
+
+    def test_decrement(self):
+        """
+        Tests that weights drop as columns leave V
+        """
+        b = DegreeBuckets([3, 2, 2])
+        b.decrement([0, 0])
+        self.assertEqual(b.minimum(), (1, set([0])))
+        b.decrement([0])
+        self.assertEqual(b.minimum(), (2, set([1, 2])))
+
+    def test_remove_and_swap(self):
+        """
+        Tests that pivot rows stop being tracked and that swaps
+        follow rows around
+        """
+        b = DegreeBuckets([2, 1, 3])
+        b.swap(0, 1)
+        self.assertEqual(b.weights, [1, 2, 3])
+        b.remove(0)
+        self.assertEqual(b.minimum(), (2, set([1])))
+        b.decrement([0])
+        self.assertEqual(b.weights[0], 0)
@@ -0,0 +1,91 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from cache import LRUCache
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import random_source
+from raptor import RaptorR10
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_eviction(self):
+        """
+        Tests that the least recently used entry is dropped first
+        """
+        c = LRUCache(2)
+        c.put('a', 1)
+        c.put('b', 2)
+        self.assertEqual(c.get('a'), 1)
+        c.put('c', 3)
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(c.get('a'), 1)
+        self.assertEqual(c.get('c'), 3)
+        self.assertEqual(c.stats(), {'hits': 3, 'misses': 1, 'entries': 2})
+
+    def test_disabled(self):
+        """
+        Tests that a cache of size 0 holds nothing
+        """
+        c = LRUCache(0)
+        c.put('a', 1)
+        self.assertEqual(len(c), 0)
+        self.assertIsNone(c.get('a'))
+
+    def test_resize(self):
+        """
+        Tests that a size read from a function is followed as it changes
+        """
+        size = [2]
+        c = LRUCache(lambda: size[0])
+        c.put('a', 1)
+        c.put('b', 2)
+        size[0] = 1
+        self.assertIsNone(c.get('a'))
+        self.assertEqual(c.get('b'), 2)
+        size[0] = 0
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(len(c), 0)
+
+    def test_config_size(self):
+        """
+        Tests that the shared caches follow the sizes set in config
+        """
+        saved = config.context_cache_size
+        try:
+            config.context_cache_size = 0
+            RaptorR10.context_for(10)
+            self.assertEqual(len(RaptorR10.context_cache), 0)
+            config.context_cache_size = saved
+            RaptorR10.context_for(10)
+            self.assertEqual(len(RaptorR10.context_cache), 1)
+        finally:
+            config.context_cache_size = saved
+
+    def test_schedule_shared(self):
+        """
+        Tests that decoders holding the same esis share one schedule
+        """
+        k = 20
+        encoder = Encoder(k, random_source(k, 4))
+        symbols = [encoder.next() for i in xrange(k * 2)][3:]
+
+        RaptorR10.schedule_cache.clear()
+        schedules = []
+        for i in xrange(2):
+            decoder = Decoder(k)
+            for symbol in symbols:
+                decoder.append(symbol)
+            decoder.decode()
+            schedules.append(decoder.last_schedule[1])
+        self.assertTrue(schedules[0] is schedules[1])
+        stats = RaptorR10.schedule_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
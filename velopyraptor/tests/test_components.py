@@ -0,0 +1,85 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components import ComponentTracker
+
+# row -> the two columns of V it has ones in
+EDGES = {
+    0: (0, 1),
+    1: (5, 6),
+    2: (1, 2),
+    3: (2, 3),
+    4: (6, 7),
+}
+
+class TestComponentTracker(unittest.TestCase):
+
+    def tracker(self, rows):
+        t = ComponentTracker()
+        for row in rows:
+            t.add(row)
+        return t
+
+    def test_empty(self):
+        """
+        Tests that no row is picked without edges
+        """
+        self.assertEqual(ComponentTracker().largest(EDGES.get), None)
+
+    def test_largest(self):
+        """
+        Tests that the lowest row of the largest component is picked
+        """
+        t = self.tracker(EDGES)
+        self.assertEqual(t.largest(EDGES.get), 0)
+        self.assertEqual(t.size[t.best], 3)
+        self.assertEqual(sorted(t.largest_rows(EDGES.get)), [0, 2, 3])
+        self.assertEqual(ComponentTracker().largest_rows(EDGES.get), [])
+
+    def test_discard_splits(self):
+        """
+        Tests that removing an edge splits its component
+        """
+        t = self.tracker(EDGES)
+        t.largest(EDGES.get)
+        t.discard(2)
+        self.assertEqual(t.largest(EDGES.get), 1)
+
+    def test_discard_keeps_others(self):
+        """
+        Tests that removing an edge only rebuilds its own component
+        """
+        t = self.tracker(EDGES)
+        t.largest(EDGES.get)
+        root = t.best
+        t.discard(4)
+        self.assertEqual(list(t.dirty), [t.find(5)])
+        self.assertEqual(t.largest(EDGES.get), 0)
+        self.assertEqual(t.best, root)
+        self.assertEqual(t.rows[t.find(5)], set([1]))
+        self.assertTrue(7 not in t.parent)
+
+    def test_incremental(self):
+        """
+        Tests that edges added after a query join existing components
+        """
+        t = self.tracker([1, 4])
+        self.assertEqual(t.largest(EDGES.get), 1)
+        t.add(0)
+        t.add(2)
+        t.add(3)
+        self.assertEqual(t.largest(EDGES.get), 0)
+
+    def test_swap(self):
+        """
+        Tests that edges follow exchanged rows
+        """
+        t = self.tracker([0, 2])
+        t.largest(EDGES.get)
+        t.swap(0, 9)
+        self.assertEqual(t.largest(EDGES.get), 2)
+        self.assertEqual(t.edges[9], EDGES[0])
@@ -0,0 +1,66 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context import CodingContext
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import random_source
+import distributions.gray as gray
+
+class TestCodingContext(unittest.TestCase):
+
+    def test_shared(self):
+        """
+        Tests that coders with the same k share one context
+        """
+        self.assertTrue(Decoder(100).context is Decoder(100).context)
+        self.assertFalse(Decoder(100).context is Decoder(101).context)
+
+    def test_lazy(self):
+        """
+        Tests that a lazy value is only built once
+        """
+        context = CodingContext(10)
+        built = []
+        build = lambda: built.append(1) or len(built)
+        self.assertEqual(context.lazy('a', build), 1)
+        self.assertEqual(context.lazy('a', build), 1)
+        self.assertEqual(len(built), 1)
+
+    def test_encoder_schedule_shared(self):
+        """
+        Tests that encoders of the same k reuse the schedule for the
+        source symbols
+        """
+        k = 30
+        symbols = random_source(k, 4)
+        e1 = Encoder(k, symbols)
+        e2 = Encoder(k, symbols)
+        self.assertTrue(e1.last_schedule[1] is e2.last_schedule[1])
+
+    def test_constraints_read_only(self):
+        """
+        Tests that the constraint rows handed out can not change the
+        rows kept by the context
+        """
+        d = Decoder(50)
+        rows = d.constraints()
+        rows.data[:] = 0
+        self.assertTrue(d.constraints().data.any())
+
+    def test_large_k_grays(self):
+        """
+        Tests that there are enough grays for the hdpc rows of the
+        largest k
+        """
+        d = Decoder(8192)
+        sequence = gray.with_ones(d.h_prime, d.k + d.s)
+        self.assertEqual(len(sequence), d.k + d.s)
+        self.assertEqual(len(d.hdpc_section()), d.h)
+
+if __name__ == '__main__':
+    unittest.main()
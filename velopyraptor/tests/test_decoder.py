@@ -0,0 +1,115 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import assert_decoded, decode, random_source
+
+class TestDecoder(unittest.TestCase):
+
+    def test_streaming(self):
+        """
+        Tests that symbols resolved while appending are the intermediate
+        symbols and that decoding what is left recovers the source
+        """
+        k = 100
+        source = random_source(k, 16)
+        encoder = Encoder(k, source)
+        symbols = encoder.take(k * 3)[k / 2:]
+
+        decoder = Decoder(k, use_streaming=True)
+        for symbol in symbols[:k / 2]:
+            decoder.append(symbol)
+        for symbol in symbols[k / 2:]:
+            if decoder.append(symbol):
+                break
+        self.assertTrue(decoder.resolved)
+        for column, symbol in decoder.resolved.iteritems():
+            self.assertTrue((symbol == encoder.i_symbols[column]).all())
+
+        # Rows nothing was XORed into still hold the appended arrays
+        appended = set(id(symbol) for esi, symbol in symbols)
+        for unknown, data, owned in decoder.pending.itervalues():
+            if data is not None and not owned:
+                self.assertTrue(id(data) in appended)
+        self.assertTrue(any(not owned for unknown, data, owned in decoder.pending.itervalues()))
+
+        decoder.decode()
+        assert_decoded(self, decoder, source)
+        for esi, symbol in symbols[:k]:
+            self.assertTrue((symbol == encoder.ltenc(esi)).all())
+
+    def test_streaming_small(self):
+        """
+        Tests streaming decoding of small k where little or nothing peels
+        """
+        for k in (4, 10, 20):
+            source = random_source(k, 2, k)
+            symbols = Encoder(k, source).take(k * 2)[1:]
+            decoder = decode(Decoder(k, use_streaming=True), symbols)
+            assert_decoded(self, decoder, source)
+
+    def test_symbols_replaced(self):
+        """
+        Tests that symbols replaced or edited after can_decode are decoded
+        from rather than the rows packed for the old symbols
+        """
+        k = 20
+        source = random_source(k, 4)
+        symbols = Encoder(k, source).take(k * 4)
+        for use_streaming in (False, True):
+            decoder = Decoder(k, use_streaming=use_streaming)
+            for symbol in symbols[k:k * 2]:
+                decoder.append(symbol)
+            decoder.can_decode()
+            decoder.symbols = symbols[k * 2 + 5:]
+            self.assertTrue(decoder.can_decode())
+            decoder.decode()
+            assert_decoded(self, decoder, source)
+
+            decoder = Decoder(k, use_streaming=use_streaming)
+            for symbol in symbols[k:k * 2 + 5]:
+                decoder.append(symbol)
+            decoder.can_decode()
+            decoder.symbols[3] = symbols[k * 2 + 5]
+            decoder.decode()
+            assert_decoded(self, decoder, source)
+
+    def test_recover_source(self):
+        """
+        Tests that received source symbols are returned untouched and
+        only the missing ones are encoded
+        """
+        k = 100
+        source = random_source(k, 4)
+        symbols = Encoder(k, source).take(k * 2)
+
+        # Every other source symbol plus repair symbols
+        decoder = Decoder(k)
+        for symbol in symbols[:k:2] + symbols[k:k + k / 2 + 10]:
+            decoder.append(symbol)
+        recovered = decoder.recover_source()
+        self.assertTrue(decoder.i_symbols is not None)
+        for i in xrange(k):
+            self.assertTrue((recovered[i] == source[i][1]).all())
+            if i % 2 == 0:
+                self.assertTrue(recovered[i] is symbols[i][1])
+
+    def test_recover_systematic(self):
+        """
+        Tests that nothing is decoded when every source symbol was received
+        """
+        k = 50
+        source = random_source(k, 4)
+        decoder = Decoder(k, list(reversed(source)))
+        recovered = decoder.recover_source()
+        self.assertTrue(decoder.i_symbols is None)
+        for i in xrange(k):
+            self.assertTrue(recovered[i] is source[i][1])
+
+if __name__ == '__main__':
+    unittest.main()
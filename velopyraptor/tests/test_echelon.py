@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+import unittest
+
+import numpy
+from bitarray import bitarray
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitmatrix import BitMatrix
+from decoder import Decoder
+from echelon import Echelon
+from encoder import Encoder
+from fixtures import random_source
+from raptor import RaptorR10DecodingScheduleException
+
+class TestEchelon(unittest.TestCase):
+
+    def test_rank(self):
+        """
+        Tests that dependent rows do not grow the rank
+        """
+        rows = BitMatrix.from_bitarrays([
+            bitarray('1' + '0' * 68 + '1' + '0' * 30),
+            bitarray('0' * 69 + '1' + '0' * 29 + '1'),
+            bitarray('1' + '0' * 98 + '1'),
+            bitarray('0' * 100),
+        ]).data
+        e = Echelon(100)
+        self.assertTrue(e.add(rows[0]))
+        self.assertTrue(e.add(rows[1]))
+        self.assertFalse(e.add(rows[2]))
+        self.assertFalse(e.add(rows[3]))
+        self.assertEqual(e.rank, 2)
+        self.assertFalse(e.reduce(rows[2]).any())
+
+    def test_full(self):
+        """
+        Tests that the identity reaches full rank in any order
+        """
+        columns = range(130)
+        random.shuffle(columns)
+        e = Echelon(130)
+        for column in columns:
+            self.assertFalse(e.full())
+            self.assertTrue(e.add(BitMatrix.from_columns([[column]], 130).data[0]))
+        self.assertTrue(e.full())
+
+    def test_decoder_agrees_with_schedule(self):
+        """
+        Tests that the decoder reports decodability exactly when a
+        decoding schedule can be built
+        """
+        k = 40
+        encoder = Encoder(k, random_source(k, 4))
+        symbols = [encoder.next() for i in xrange(k * 2)]
+
+        decoder = Decoder(k)
+        self.assertRaises(RaptorR10DecodingScheduleException, decoder.decode)
+        for symbol in symbols[k / 2:]:
+            can_decode = decoder.append(symbol)
+            try:
+                decoder.decoding_schedule(decoder.a())
+                self.assertTrue(can_decode)
+            except RaptorR10DecodingScheduleException:
+                self.assertFalse(can_decode)
+        self.assertTrue(can_decode)
+
+if __name__ == '__main__':
+    unittest.main()
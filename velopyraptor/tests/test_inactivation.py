@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inactivation
+from bitmatrix import BitMatrix
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import assert_decoded, decode, random_source
+from schedule import Schedule
+
+class TestInactivation(unittest.TestCase):
+
+    def test_peel(self):
+        """
+        Tests peeling rows with one active column and inactivating when
+        every row has more
+        """
+        rows = [[0, 1, 2], [1, 2], [0, 2], [3], [0, 1, 3]]
+        pivots, inactive = inactivation.peel(rows, 4)
+        self.assertEqual(pivots[0], (3, 3))
+        self.assertEqual(len(pivots) + len(inactive), 4)
+        self.assertEqual(len(set([row for row, column in pivots])), len(pivots))
+        self.assertEqual(sorted([column for row, column in pivots] + inactive), [0, 1, 2, 3])
+
+        self.assertEqual(inactivation.peel([[0], [0]], 2), None)
+
+    def test_sparse_rows(self):
+        """
+        Tests listing the columns of packed rows
+        """
+        rows = [[0, 69, 99], [], [5]]
+        a = BitMatrix.from_columns(rows, 100)
+        self.assertEqual(inactivation.sparse_rows(a), rows)
+
+    def test_eliminate_dense(self):
+        """
+        Tests solving a packed system with a spare row
+        """
+        values = [0b011, 0b110, 0b011, 0b100]
+        words = inactivation.to_words(values, 3)
+        self.assertEqual(words[:, 0].tolist(), values)
+        self.assertEqual(inactivation.to_words([1 << 70], 71)[0].tolist(), [0, 1 << 6])
+
+        schedule = Schedule(3, 4)
+        self.assertTrue(inactivation.eliminate_dense(words, 3, schedule, 0))
+        self.assertEqual(words[:3, 0].tolist(), [1, 2, 4])
+        self.assertEqual(list(schedule.d), [0, 1, 3, 2])
+
+        schedule = Schedule(3, 3)
+        words = inactivation.to_words(values[:3], 3)
+        self.assertFalse(inactivation.eliminate_dense(words, 3, schedule, 0))
+
+    def test_decode(self):
+        """
+        Tests decoding with schedules built by inactivation
+        """
+        k = 200
+        source = random_source(k, 4)
+        encoder = Encoder(k, source, use_inactivation=True)
+        symbols = encoder.take(k * 2)[k / 2:k / 2 + k + 10]
+        decoder = decode(Decoder(k, use_inactivation=True), symbols)
+        assert_decoded(self, decoder, source)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import decode, random_source
+
+class TestParallel(unittest.TestCase):
+
+    def test_ranges(self):
+        """
+        Tests splitting columns between threads
+        """
+        self.assertEqual(parallel.ranges(100, 8, 4), [slice(0, 100)])
+        self.assertEqual(
+            parallel.ranges(32768, 8, 3),
+            [slice(0, 10928), slice(10928, 21856), slice(21856, 32768)]
+        )
+        self.assertEqual(len(parallel.ranges(32768, 8, 32)), 4)
+
+    def test_threaded_coding(self):
+        """
+        Tests that threaded encoding and decoding match single threaded
+        """
+        k = 10
+        def code(threads):
+            encoder = Encoder(k, random_source(k, 32768), threads=threads)
+            symbols = encoder.take(k * 2)[k / 2:]
+            decoder = decode(Decoder(k, threads=threads), symbols)
+            return [decoder.ltenc(i) for i in xrange(k)] + [s for i, s in symbols]
+
+        for one, many in zip(code(1), code(4)):
+            self.assertTrue((one == many).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inactivation
+import pivoting
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import assert_decoded, decode, random_source
+from raptor import RaptorR10
+
+class TestPivoting(unittest.TestCase):
+
+    def test_get(self):
+        """
+        Tests looking up rules by name
+        """
+        self.assertEqual(pivoting.get('rfc').name, 'rfc')
+        self.assertEqual(sorted(pivoting.STRATEGIES), ['markowitz', 'min-xor', 'rfc'])
+        self.assertRaises(KeyError, pivoting.get, 'nope')
+
+    def test_min_xor_column(self):
+        """
+        Tests the min-xor rule solves the column shared by the fewest rows
+        """
+        # Every row has two columns.  Column 3 is only in row 2 while
+        # columns 0 and 1 are in three rows.
+        rows = [[0, 1], [0, 1], [0, 3], [1, 2], [2, 3]]
+        pivots, inactive = inactivation.peel(rows, 4, pivoting.get('min-xor'))
+        self.assertEqual(sorted([column for row, column in pivots] + inactive), [0, 1, 2, 3])
+        self.assertTrue(pivots[0][1] in (2, 3))
+
+    def test_schedule_key(self):
+        """
+        Tests the rule is one of the schedule options
+        """
+        self.assertNotEqual(
+            RaptorR10(64).schedule_key(), RaptorR10(64, pivoting='markowitz').schedule_key()
+        )
+
+    def test_decode(self):
+        """
+        Tests decoding with every rule on both ways of building schedules
+        """
+        k = 200
+        source = random_source(k, 4)
+        for name in sorted(pivoting.STRATEGIES):
+            for use_inactivation in (False, True):
+                options = dict(pivoting=name, use_inactivation=use_inactivation)
+                encoder = Encoder(k, source, **options)
+                symbols = encoder.take(k * 2)[k / 2:k / 2 + k + 10]
+                decoder = decode(Decoder(k, **options), symbols)
+                assert_decoded(self, decoder, source, name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import plans
+from encoder import Encoder
+from fixtures import random_source
+from raptor import RaptorR10
+
+K = 25
+
+class NoScheduleEncoder(Encoder):
+    """
+    Encoder that fails if it has to build a schedule
+    """
+
+    def decoding_schedule(self, a):
+        raise AssertionError("Schedule was built instead of loaded")
+
+class TestPlans(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path, = plans.generate(self.directory, [K])
+        self.key = RaptorR10(K).schedule_key()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        config.plan_directory = None
+        RaptorR10.context_cache.clear()
+
+    def test_round_trip(self):
+        """
+        Tests that a loaded plan matches the schedule it was made from
+        """
+        coder = RaptorR10(K)
+        coder.symbols = [(i, None) for i in xrange(K)]
+        schedule = coder.decoding_schedule(coder.a())
+        loaded = plans.load(self.path, K, self.key)
+        self.assertEqual(list(loaded.c), list(schedule.c))
+        self.assertEqual(list(loaded.d), list(schedule.d))
+        self.assertEqual(loaded.xors, schedule.xors)
+
+    def test_rejects(self):
+        """
+        Tests that plans for other k or options and corrupt plans
+        are not loaded
+        """
+        self.assertIsNone(plans.load(self.path, K + 1, self.key))
+        self.assertIsNone(plans.load(self.path, K, (not self.key[0],)))
+        self.assertIsNone(plans.load(self.path + 'missing', K, self.key))
+
+        with open(self.path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(chr(ord(last) ^ 1))
+        self.assertIsNone(plans.load(self.path, K, self.key))
+
+    def test_encoder_uses_plan(self):
+        """
+        Tests that an encoder loads its plan instead of building a schedule
+        """
+        symbols = lambda: random_source(K, 4)
+        expected = Encoder(K, symbols())
+
+        RaptorR10.context_cache.clear()
+        config.plan_directory = self.directory
+        encoder = NoScheduleEncoder(K, symbols())
+        for i in xrange(K * 2):
+            self.assertTrue((encoder.next()[1] == expected.next()[1]).all())
+
+if __name__ == '__main__':
+    unittest.main()
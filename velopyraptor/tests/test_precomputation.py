@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+import numpy
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import precomputation
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import assert_decoded, decode, random_source
+from schedule import Schedule
+
+class TestPrecomputation(unittest.TestCase):
+
+    def test_walk(self):
+        """
+        Tests that combinations are walked in Gray code order
+        """
+        self.assertEqual([precomputation.inverse_gray(v) for v in [0, 1, 3, 2, 6]], [0, 1, 2, 3, 4])
+        self.assertEqual(precomputation.walk([1, 6, 3, 3, 0, 5]), [3, 6, 5])
+        self.assertEqual(precomputation.walk_cost([3, 6, 5]), 2 + 2 + 2)
+
+    def test_cost(self):
+        """
+        Tests counting XORs for a U_upper where most rows share patterns
+        """
+        bits = numpy.zeros((20, 4), dtype=bool)
+        bits[:, :3] = True
+        bits[0] = [True, False, False, True]
+        self.assertEqual(precomputation.patterns(bits, 0, 2).tolist(), [1] + [3] * 19)
+
+        # 19 rows of 3 and one row of 1 then 19 rows of 1 and one of 2
+        self.assertEqual(precomputation.cost(bits, 2), 20 + 2 + 20)
+        # One group of 3 with 19 rows of 7 and one of 1, then row 0 alone
+        self.assertEqual(precomputation.best_width(bits), (3, 20 + 3 + 1))
+        self.assertEqual(precomputation.best_width(bits[:2]), (None, 5))
+
+    def test_decode(self):
+        """
+        Tests decoding with the precomputation using scratch rows
+        """
+        k = 300
+        source = random_source(k, 4)
+        encoder = Encoder(k, source, use_precomputation=True)
+        symbols = encoder.take(k * 2)[k / 2:k / 2 + k + 10]
+        decoder = decode(Decoder(k, use_precomputation=True), symbols)
+        assert_decoded(self, decoder, source)
+
+        schedule = decoder.last_schedule[1]
+        self.assertTrue(schedule.scratch > 0)
+        self.assertEqual(Schedule.fromstring(schedule.tostring()).scratch, schedule.scratch)
+
+if __name__ == '__main__':
+    unittest.main()
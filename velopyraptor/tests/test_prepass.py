@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+
+import numpy
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import assert_decoded, decode, random_source
+from raptor import RaptorR10
+from schedule import Schedule
+
+K = 256
+
+class TestPrepass(unittest.TestCase):
+
+    def run_prepass(self, **kwargs):
+        coder = RaptorR10(K, **kwargs)
+        coder.symbols = [(esi, None) for esi in xrange(K)]
+        a = coder.a()
+        before = a.data.copy()
+        schedule = Schedule(coder.l, len(a))
+        coder.prepass(a, schedule)
+        return coder, before, a, schedule
+
+    def test_stats(self):
+        """
+        Tests the counts left by a full prepass match the XORs it made
+        """
+        coder, before, a, schedule = self.run_prepass()
+        stats = coder.prepass_stats
+        self.assertFalse(stats['exhausted'])
+        self.assertTrue(stats['xors'] > 0)
+        self.assertEqual(stats['xors'], len(schedule.pairs) // 2)
+
+        ones = lambda data: int(numpy.unpackbits(data.view('uint8')).sum())
+        self.assertEqual(ones(before) - ones(a.data), stats['ones_removed'])
+
+    def test_budget(self):
+        """
+        Tests the prepass stops once its budget is spent
+        """
+        full = self.run_prepass()[0].prepass_stats
+        coder, before, a, schedule = self.run_prepass(prepass_budget=full['work'] // 4)
+        stats = coder.prepass_stats
+        self.assertTrue(stats['exhausted'])
+        self.assertTrue(stats['xors'] < full['xors'])
+
+        coder, before, a, schedule = self.run_prepass(prepass_budget=0)
+        self.assertEqual(coder.prepass_stats['xors'], 0)
+        self.assertTrue((before == a.data).all())
+
+    def test_decode(self):
+        """
+        Tests decoding with a budget small enough to stop the prepass
+        """
+        source = random_source(K, 4)
+        encoder = Encoder(K, source, prepass_budget=1000)
+        symbols = encoder.take(K * 2)[K / 2:K / 2 + K + 10]
+        decoder = decode(Decoder(K, prepass_budget=1000), symbols)
+        assert_decoded(self, decoder, source)
+        self.assertTrue(decoder.prepass_stats['exhausted'])
+        self.assertNotEqual(decoder.schedule_key(), RaptorR10(K).schedule_key())
+
+if __name__ == '__main__':
+    unittest.main()
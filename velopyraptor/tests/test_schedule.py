@@ -1,11 +1,19 @@
 import math
 import os
 import sys
+import threading
+import time
 import unittest
 
 # Parent holds the encoding/decoding python files
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import numpy
+
+import config
+from decoder import Decoder
+from encoder import Encoder
+from fixtures import decode, random_source
 from schedule import Schedule
 
 class TestSchedule(unittest.TestCase):
@@ -65,3 +73,156 @@ class TestSchedule(unittest.TestCase):
         source_row, target_row = s.xors[0]
         self.assertTrue(source_row == 1)
         self.assertTrue(target_row == 0)
+
+    def test_without_zeros(self):
+        """
+        Tests that xors out of zero rows are dropped and xors into
+        zero rows become copies
+        """
+        s = Schedule(4, 4)
+        s.xors = [(0, 1), (2, 0), (0, 3), (1, 0), (1, 3)]
+        operations, dropped, copies = s.without_zeros(2)
+        self.assertEqual(operations, [(2, 0, True), (0, 3, False)])
+        self.assertEqual((dropped, copies), (3, 1))
+
+    def test_optimized(self):
+        """
+        Tests that dead xors are dropped and runs into one target fused
+        """
+        s = Schedule(2, 4)
+        s.d = [1, 3, 0, 2]
+        s.xors = [(2, 0), (3, 1), (2, 1), (0, 3), (1, 2), (3, 1)]
+        operations, counts = s.optimized(1, 2)
+        self.assertEqual(operations, [(0, [2], True), (1, [3, 2], False), (3, [0], False), (1, [3], False)])
+        self.assertEqual(counts['dead_xors'], 1)
+        self.assertEqual(counts['operations'], 4)
+
+    def test_levels(self):
+        """
+        Tests that operations wait for the rows they depend on and that
+        a level reads before it writes
+        """
+        s = Schedule(3, 4)
+        s.d = [0, 1, 2, 3]
+        s.xors = [(3, 0), (3, 1), (0, 2), (2, 3), (1, 2)]
+        levels, counts = s.levels(0, 3)
+        self.assertEqual((counts['levels'], counts['dead_xors']), (3, 1))
+        self.assertEqual(levels.bounds.tolist(), [0, 2, 3, 4])
+
+        D = numpy.array([[1], [2], [4], [8]], dtype='uint64')
+        levels.replay(D)
+        self.assertEqual(D.ravel().tolist(), [9, 10, 7, 8])
+
+    def test_levels_match_fused(self):
+        """
+        Tests that level and fused replay decode the same symbols
+        """
+        k = 40
+        encoder = Encoder(k, random_source(k, 16))
+        decoder = decode(Decoder(k), encoder.take(k * 2)[k / 2:])
+        schedule = decoder.last_schedule[1]
+
+        D = decoder.calculate_d()
+        decoder.replay_fused(schedule, D)
+        levels = decoder.calculate_d()
+        schedule.levels(decoder.s + decoder.h, decoder.l)[0].replay(levels)
+        self.assertTrue((D[schedule.d[:decoder.l]] == levels[schedule.d[:decoder.l]]).all())
+
+    def test_compiled(self):
+        """
+        Tests that the generated replay function decodes the same symbols
+        as fused replay and keeps its source
+        """
+        k = 40
+        encoder = Encoder(k, random_source(k, 16))
+        decoder = decode(Decoder(k), encoder.take(k * 2)[k / 2:])
+        schedule = decoder.last_schedule[1]
+
+        replay, counts = schedule.compiled(decoder.s + decoder.h, decoder.l)
+        self.assertTrue(replay.source.startswith("def replay(d, xor):"))
+        self.assertTrue(schedule.compiled(decoder.s + decoder.h, decoder.l)[0] is replay)
+
+        D = decoder.calculate_d()
+        decoder.replay_fused(schedule, D)
+        compiled = decoder.calculate_d()
+        replay(compiled, numpy.bitwise_xor)
+        self.assertTrue((D[schedule.d[:decoder.l]] == compiled[schedule.d[:decoder.l]]).all())
+
+    def test_compiled_limit(self):
+        """
+        Tests that schedules over the limit replay without compiling
+        """
+        k = 40
+        symbols = Encoder(k, random_source(k, 16)).take(k * 2)[k / 2:]
+        limit = config.compiled_replay_max_operations
+        try:
+            for maximum, compiled in ((0, False), (limit, True)):
+                config.compiled_replay_max_operations = maximum
+                decoder = Decoder(k, list(symbols), use_compiled_replay=True)
+                schedule = decoder.schedule()
+                schedule.rewritten.clear()
+                D = decoder.calculate_d()
+                decoder.replay_fused(schedule, D)
+                keys = [key[0] for key in schedule.rewritten]
+                self.assertEqual('compiled' in keys, compiled)
+        finally:
+            config.compiled_replay_max_operations = limit
+
+    def test_rewrite_once(self):
+        """
+        Tests that threads asking for the same rewrite together build it
+        once and all get the same result
+        """
+        s = Schedule(2, 2)
+        built = []
+
+        def build():
+            built.append(True)
+            time.sleep(0.01)
+            return object()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(s.rewrite(('test',), build)))
+            for i in xrange(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(built), 1)
+        self.assertEqual(len(set(map(id, results))), 1)
+
+    def test_serialize(self):
+        """
+        Tests writing a schedule to a string and reading it back
+        """
+        s = Schedule(3, 5)
+        s.exchange_row(0, 4)
+        s.exchange_column(1, 2)
+        s.xor(1, 0)
+        s.xor(2, 3)
+        loaded = Schedule.fromstring("xx" + s.tostring(), 2)
+        self.assertEqual(list(loaded.c), [0, 2, 1])
+        self.assertEqual(list(loaded.d), [4, 1, 2, 3, 0])
+        self.assertEqual(loaded.xors, [(4, 1), (3, 2)])
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(Schedule.fromstring(Schedule(0, 0).tostring()).xors, [])
+
+    def test_optimized_replay(self):
+        """
+        Tests that replaying the optimized schedule gives exactly the
+        intermediate symbols the recorded xors give
+        """
+        k = 30
+        encoder = Encoder(k, random_source(k, 16))
+        decoder = decode(Decoder(k), encoder.take(k * 2)[k / 2:])
+        self.assertTrue(decoder.schedule_stats['dead_xors'] > 0)
+
+        schedule = decoder.last_schedule[1]
+        D = decoder.calculate_d()
+        for source, target in schedule.xors:
+            D[target] ^= D[source]
+        for i in xrange(decoder.l):
+            self.assertTrue((decoder.i_symbols[schedule.c[i]] == D[schedule.d[i]]).all())
+
@@ -116,6 +116,38 @@ class TestStringDecoder(unittest.TestCase):
         coder = StringDecoder(symbols)
         self.assertTrue(DEFAULT_K == coder.k)
         self.assertTrue(padding == coder.padding)
+
+    def test_source_not_decoded(self):
+        """
+        Tests that nothing is decoded when every source symbol is held
+        and that the schedule is only built on first use
+        """
+        symbols = self.get_random_symbols(80, 0)
+        coder = StringDecoder(symbols)
+        self.assertIsNone(coder.i_symbols)
+        self.assertIsNone(coder.last_schedule)
+        string = coder.decode()
+        self.assertEqual(string, "".join(s[len(s) - 80:] for s in symbols))
+        self.assertIsNone(coder.i_symbols)
+        self.assertIsNone(coder.last_schedule)
+
+        coder.calculate_i_symbols()
+        esis, schedule = coder.last_schedule
+        self.assertEqual(esis, tuple(range(DEFAULT_K)))
+        coder.calculate_i_symbols()
+        self.assertTrue(coder.last_schedule[1] is schedule)
+
+    def test_repair_decoded(self):
+        """
+        Tests that a missing source symbol is decoded on first use
+        """
+        size = 1000
+        string = os.urandom(size)
+        encoder = StringEncoder(DEFAULT_K, string)
+        symbols = [encoder.next() for i in xrange(DEFAULT_K * 2)][1:]
+        coder = StringDecoder(symbols)
+        self.assertIsNone(coder.i_symbols)
+        self.assertEqual(coder.decode(), string)
         self.assertIsNotNone(coder.i_symbols)
 
     def test_bad_k(self):
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+
+# Parent holds the encoding/decoding python files
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encoder import Encoder
+from fixtures import random_source
+from raptor import RaptorR10
+import distributions.degree as degree
+
+class TestTriples(unittest.TestCase):
+
+    def test_degree(self):
+        """
+        Tests the searched degree table against the scanned one
+        """
+        v = [0, 10240, 10241, 491581, 491582, 1032189, 1048575]
+        self.assertEqual(degree.R10_array(v).tolist(), [degree.R10(x) for x in v])
+        self.assertRaises(Exception, degree.R10_array, [1048576])
+
+    def test_batch_matches_single(self):
+        """
+        Tests that the batched triples and lt indexes match the ones
+        found one esi at a time
+        """
+        for k in [4, 100, 1000]:
+            coder = RaptorR10(k)
+            esis = range(3 * k) + [65535, 1000000]
+            d, a, b = coder.triples(esis)
+            indices, degrees = coder.lt_indices_batch(esis)
+            for n, esi in enumerate(esis):
+                self.assertEqual(coder.triple(esi), (d[n], a[n], b[n]))
+                self.assertEqual(coder.lt_indices(esi), indices[n, :degrees[n]].tolist())
+                self.assertTrue((indices[n, degrees[n]:] == -1).all())
+
+    def test_take(self):
+        """
+        Tests that producing symbols together matches producing them
+        one at a time
+        """
+        k = 20
+        symbols = lambda: random_source(k, 4)
+        one, many = Encoder(k, symbols()), Encoder(k, symbols())
+        for esi, symbol in many.take(k * 2):
+            expected = one.next()
+            self.assertEqual(esi, expected[0])
+            self.assertTrue((symbol == expected[1]).all())
+
+if __name__ == '__main__':
+    unittest.main()